@@ -1,15 +1,43 @@
+import os
+
 import dash
-from dash import Dash, html, dcc, callback, Input, Output
+import diskcache
+from dash import Dash, DiskcacheManager, html, dcc, callback, Input, Output
+
+from rotas.api import bp_api
+from rotas.exportacao import bp_exportacao
+from rotas.metricas import bp_metricas
+from rotas.saude import bp_saude
+from servicos.compressao import instalar_compressao
+from servicos.metricas import instalar_metricas
+from servicos.dados_contratos import DIR_CACHE
+
 
+# Fila dos callbacks em segundo plano (ex.: relatório PDF), fora dos workers web
+background_callback_manager = DiskcacheManager(
+    diskcache.Cache(os.path.join(DIR_CACHE, "callbacks"))
+)
 
 app = Dash(
     __name__,
     use_pages=True,
     suppress_callback_exceptions=True,
+    background_callback_manager=background_callback_manager,
     meta_tags=[{"name": "viewport", "content": "width=device-width, initial-scale=1"}],
 )
 server = app.server
 
+# Exportações CSV/XLSX em fluxo, API JSON, prontidão e métricas, direto no Flask
+server.register_blueprint(bp_exportacao)
+server.register_blueprint(bp_api)
+server.register_blueprint(bp_saude)
+server.register_blueprint(bp_metricas)
+
+# Compressão br/gzip das respostas (callbacks, API, assets)
+instalar_compressao(server)
+# Latência e tamanho por rota/callback; depois da compressão (mede o original)
+instalar_metricas(app)
+
 
 app.layout = html.Div(
     className="app-root",
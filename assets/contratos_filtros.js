@@ -0,0 +1,283 @@
+// --------------------------------------------------
+// Filtragem da tabela de contratos no navegador
+// (modo CONTRATOS_FILTRO_NO_NAVEGADOR=1, ver pages/contratos.py)
+//
+// Mesma semântica de servicos/consulta_contratos.py: busca parcial sem acento
+// e sem caixa em Contrato/Objeto, OR dos valores escolhidos dentro de cada
+// coluna e AND entre as colunas, linhas sem Status fora, ordem da base.
+// A base chega uma vez por versão (dados_para_navegador).
+// --------------------------------------------------
+(function () {
+    "use strict";
+
+    // Posição de cada coluna de seleção na tupla canônica dos filtros
+    var COLUNAS_SELECAO = [
+        ["Setor", 2],
+        ["Grupo", 3],
+        ["Empresa Contratada", 4],
+        ["Status da Vigência", 5],
+    ];
+
+    var COLUNAS_CATEGORICAS = {
+        "Setor": true,
+        "Grupo": true,
+        "Empresa Contratada": true,
+        "Status da Vigência": true,
+    };
+
+    var TAMANHO_PAGINA = 50;
+
+    // ---------- forma canônica dos filtros ----------
+    function normalizarTexto(valor) {
+        // casefold + NFKD sem marcas combinantes ("Ação" -> "acao")
+        return String(valor)
+            .toLowerCase()
+            .replace(/ß/g, "ss")
+            .normalize("NFKD")
+            .replace(/\p{M}/gu, "");
+    }
+
+    function normalizarTermo(texto) {
+        if (!texto || !String(texto).trim()) {
+            return "";
+        }
+        return normalizarTexto(String(texto).trim());
+    }
+
+    function normalizarSelecao(valores) {
+        if (!valores || !valores.length) {
+            return [];
+        }
+        if (typeof valores === "string") {
+            valores = [valores];
+        }
+        return Array.from(new Set(valores.map(String))).sort();
+    }
+
+    function normalizarFiltros(contrato, objeto, setor, grupo, empresa, status) {
+        return [
+            normalizarTermo(contrato),
+            normalizarTermo(objeto),
+            normalizarSelecao(setor),
+            normalizarSelecao(grupo),
+            normalizarSelecao(empresa),
+            normalizarSelecao(status),
+        ];
+    }
+
+    // ---------- resolução dos filtros em posições de linhas ----------
+    function resolverLinhas(base, filtros) {
+        var termos = [];
+        if (filtros[0]) {
+            termos.push([filtros[0], base.textos.contrato]);
+        }
+        if (filtros[1]) {
+            termos.push([filtros[1], base.textos.objeto]);
+        }
+
+        // Por coluna escolhida: quais códigos são aceitos
+        var selecoes = [];
+        COLUNAS_SELECAO.forEach(function (par) {
+            var valores = filtros[par[1]];
+            if (valores.length) {
+                var coluna = base.categorias[par[0]];
+                var aceitos = new Set(valores);
+                selecoes.push([
+                    coluna.codigos,
+                    coluna.valores.map(function (v) { return aceitos.has(v); }),
+                ]);
+            }
+        });
+
+        var status = base.categorias["Status da Vigência"];
+        var linhas = [];
+        for (var i = 0; i < base.total; i++) {
+            var codigoStatus = status.codigos[i];
+            if (codigoStatus >= 0 && status.valores[codigoStatus] === "") {
+                continue;
+            }
+
+            var ok = true;
+            for (var s = 0; ok && s < selecoes.length; s++) {
+                ok = selecoes[s][1][selecoes[s][0][i]] === true;
+            }
+            for (var t = 0; ok && t < termos.length; t++) {
+                ok = termos[t][1][i].indexOf(termos[t][0]) !== -1;
+            }
+            if (ok) {
+                linhas.push(i);
+            }
+        }
+        return linhas;
+    }
+
+    // Tabela e opções disparam juntas com os mesmos filtros: guarda o último
+    var ultima = { chave: null, linhas: null };
+
+    function consultarLinhas(base, filtros) {
+        var chave = JSON.stringify([base.versao, filtros]);
+        if (ultima.chave !== chave) {
+            ultima = { chave: chave, linhas: resolverLinhas(base, filtros) };
+        }
+        return ultima.linhas;
+    }
+
+    // ---------- saída ----------
+    function registro(base, i, colunas) {
+        var linha = {};
+        colunas.forEach(function (col) {
+            if (COLUNAS_CATEGORICAS[col]) {
+                var coluna = base.categorias[col];
+                var codigo = coluna.codigos[i];
+                linha[col] = codigo >= 0 ? coluna.valores[codigo] : "";
+            } else {
+                linha[col] = base.exibicao[col][i];
+            }
+        });
+        return linha;
+    }
+
+    function montarOpcoes(coluna, linhas, limiteLabel) {
+        // Mesma ordem e rótulos de montar_opcoes/contar_facetas: "VALOR (n)"
+        var contagens = new Array(coluna.valores.length).fill(0);
+        linhas.forEach(function (i) {
+            var codigo = coluna.codigos[i];
+            if (codigo >= 0) {
+                contagens[codigo] += 1;
+            }
+        });
+
+        var opcoes = [];
+        coluna.valores.forEach(function (valor, codigo) {
+            var qtd = contagens[codigo];
+            if (!qtd || !valor.trim()) {
+                return;
+            }
+            var nome = valor;
+            if (limiteLabel && valor.length > limiteLabel) {
+                nome = valor.slice(0, limiteLabel) + "...";
+            }
+            opcoes.push({ label: nome + " (" + qtd + ")", value: valor });
+        });
+        return opcoes;
+    }
+
+    function urlExportacao(consulta, formato) {
+        var url = "/exportar/contratos." + formato;
+        if (!consulta) {
+            return url;
+        }
+        var f = consulta.filtros;
+        var partes = [
+            ["contrato", [f[0]]],
+            ["objeto", [f[1]]],
+            ["setor", f[2]],
+            ["grupo", f[3]],
+            ["empresa", f[4]],
+            ["status", f[5]],
+        ];
+        var parametros = [];
+        partes.forEach(function (par) {
+            par[1].forEach(function (valor) {
+                parametros.push(par[0] + "=" + encodeURIComponent(valor));
+            });
+        });
+        return url + "?" + parametros.join("&");
+    }
+
+    // ---------- callbacks ----------
+    var contratos = {
+        atualizarTabela: function (
+            contrato, objeto, setor, grupo, empresa, status,
+            base, pageCurrent, pageSize, colunas
+        ) {
+            if (!base) {
+                throw globalThis.dash_clientside.PreventUpdate;
+            }
+
+            var filtros = normalizarFiltros(
+                contrato, objeto, setor, grupo, empresa, status
+            );
+            var linhas = consultarLinhas(base, filtros);
+
+            // Mudança de filtro volta para a primeira página
+            var disparos = globalThis.dash_clientside.callback_context.triggered;
+            var disparo = disparos.length ? disparos[0].prop_id.split(".")[0] : "";
+            if (disparo !== "tabela_contratos" || !pageCurrent) {
+                pageCurrent = 0;
+            }
+            pageSize = pageSize || TAMANHO_PAGINA;
+
+            var total = linhas.length;
+            var pageCount = Math.max(1, Math.ceil(total / pageSize));
+            pageCurrent = Math.min(pageCurrent, pageCount - 1);
+
+            var inicio = pageCurrent * pageSize;
+            var ids = colunas.map(function (c) { return c.id; });
+            var data = linhas.slice(inicio, inicio + pageSize).map(function (i) {
+                return registro(base, i, ids);
+            });
+
+            return [
+                data,
+                pageCount,
+                pageCurrent,
+                "Total de contratos: " + total,
+                { versao: base.versao, filtros: filtros },
+            ];
+        },
+
+        atualizarOpcoes: function (
+            contrato, objeto, setor, grupo, empresa, status, base
+        ) {
+            if (!base) {
+                throw globalThis.dash_clientside.PreventUpdate;
+            }
+
+            var filtros = normalizarFiltros(
+                contrato, objeto, setor, grupo, empresa, status
+            );
+            var linhas = consultarLinhas(base, filtros);
+            return [
+                montarOpcoes(base.categorias["Setor"], linhas),
+                montarOpcoes(base.categorias["Grupo"], linhas),
+                montarOpcoes(base.categorias["Empresa Contratada"], linhas, 80),
+            ];
+        },
+
+        limparFiltros: function () {
+            return ["", "", [], [], [], []];
+        },
+
+        atualizarLinksExportacao: function (consulta) {
+            return [urlExportacao(consulta, "csv"), urlExportacao(consulta, "xlsx")];
+        },
+
+        // Usado nos dois modos: identificador único de cada pedido de PDF,
+        // para que cliques iguais de usuários diferentes não dividam a
+        // mesma tarefa em segundo plano (a chave do Dash vem dos argumentos)
+        novoPedidoRelatorio: function (nClicks) {
+            if (!nClicks) {
+                throw globalThis.dash_clientside.PreventUpdate;
+            }
+            if (globalThis.crypto && globalThis.crypto.randomUUID) {
+                return globalThis.crypto.randomUUID();
+            }
+            return Date.now().toString(36) + "-" + Math.random().toString(36).slice(2);
+        },
+    };
+
+    globalThis.dash_clientside = Object.assign({}, globalThis.dash_clientside, {
+        contratos: contratos,
+    });
+
+    // Permite conferir a semântica fora do navegador (node)
+    if (typeof module !== "undefined" && module.exports) {
+        module.exports = {
+            normalizarFiltros: normalizarFiltros,
+            resolverLinhas: resolverLinhas,
+            montarOpcoes: montarOpcoes,
+            registro: registro,
+        };
+    }
+})();
@@ -0,0 +1 @@
+"""Medições de desempenho e memória do painel (executar a partir da raiz do repositório)."""
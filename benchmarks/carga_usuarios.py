@@ -0,0 +1,584 @@
+"""Teste de carga: usuários simultâneos usando a página de contratos no gunicorn.
+
+Uso (a partir da raiz do repositório):
+
+    python -m benchmarks.carga_usuarios
+    python -m benchmarks.carga_usuarios --usuarios 1 4 8 16 --duracao 30
+    python -m benchmarks.carga_usuarios --workers 2 4 --threads 1 4 --linhas 50000
+
+Sobe `app:server` com gunicorn.conf.py contra uma planilha sintética servida
+localmente e simula usuários que repetem o que o navegador envia ao
+`_dash-update-component`: abertura da página, digitação tecla a tecla em
+Contrato e Objeto, escolhas nos dropdowns, troca de página, limpar filtros e,
+às vezes, o PDF (callback em segundo plano, com consulta periódica).
+Para cada configuração (workers x threads) e nível de concorrência, informa
+p50/p95/p99, vazão e os PDFs não entregues; o detalhe vai para um JSON em
+benchmarks/resultados/, gravado também quando a execução é interrompida.
+Termina com código 1 se algum PDF não chegar ou algum usuário falhar.
+"""
+
+import argparse
+import gzip
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from benchmarks.dados_sinteticos import PALAVRAS, gerar_planilha, salvar_csv
+from benchmarks.desempenho_contratos import DIR_RESULTADOS, revisao_git
+from benchmarks.requisicoes_dash import (
+    ROTA_CALLBACKS,
+    corpo_callback,
+    indexar_dependencias,
+)
+from benchmarks.servidor_planilha import ServidorPlanilha
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+NIVEIS_USUARIOS = [1, 2, 4, 8, 12, 16]
+
+# Tempos de um usuário típico (segundos)
+INTERVALO_TECLA = 0.15
+PAUSA_ACAO = (0.5, 2.0)
+
+# Fração das ações que pedem o PDF
+PROBABILIDADE_PDF = 0.05
+
+# Callbacks de interação (o PDF é medido à parte, até o arquivo chegar)
+TIPOS_INTERATIVOS = {"menu", "versao", "tabela", "opcoes", "links", "limpar"}
+
+IDS_FILTROS = [
+    "filtro_contrato",
+    "filtro_objeto",
+    "filtro_setor",
+    "filtro_grupo",
+    "filtro_empresa",
+    "filtro_status_vig",
+]
+
+
+# --------------------------------------------------
+# App sob teste
+# --------------------------------------------------
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class AppGunicorn:
+    """gunicorn -c gunicorn.conf.py com cache e planilha próprios, enquanto aberto."""
+
+    def __init__(self, url_planilha, pasta, workers=None, threads=None):
+        self.porta = _porta_livre()
+        self.pasta = pasta
+        self.log = os.path.join(pasta, f"gunicorn-{self.porta}.log")
+        self.env = dict(
+            os.environ,
+            CONTRATOS_URL_PLANILHA=url_planilha,
+            CONTRATOS_DIR_CACHE=os.path.join(pasta, f"cache-{self.porta}"),
+            GUNICORN_BIND=f"127.0.0.1:{self.porta}",
+            GUNICORN_ACCESSLOG="/dev/null",
+        )
+        if workers:
+            self.env["GUNICORN_WORKERS"] = str(workers)
+        if threads:
+            self.env["GUNICORN_THREADS"] = str(threads)
+        self._processo = None
+
+    def _pronto(self):
+        conexao = http.client.HTTPConnection("127.0.0.1", self.porta, timeout=5)
+        try:
+            conexao.request("GET", "/pronto")
+            return conexao.getresponse().status == 200
+        except OSError:
+            return False
+        finally:
+            conexao.close()
+
+    def iniciar(self, espera=180):
+        with open(self.log, "w") as log:
+            self._processo = subprocess.Popen(
+                [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+                cwd=RAIZ,
+                env=self.env,
+                stdout=subprocess.DEVNULL,
+                stderr=log,
+            )
+
+        limite = time.monotonic() + espera
+        while time.monotonic() < limite:
+            if self._processo.poll() is not None:
+                break
+            if self._pronto():
+                return self
+            time.sleep(0.5)
+
+        self.parar()
+        with open(self.log) as log:
+            final = log.read()[-2000:]
+        raise RuntimeError(f"gunicorn não ficou pronto:\n{final}")
+
+    def parar(self):
+        if self._processo is not None and self._processo.poll() is None:
+            self._processo.terminate()
+            try:
+                self._processo.wait(30)
+            except subprocess.TimeoutExpired:
+                self._processo.kill()
+                self._processo.wait()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
+
+
+# --------------------------------------------------
+# Usuário virtual
+# --------------------------------------------------
+class Medicoes:
+    """Tempos de todas as requisições de um nível, de todos os usuários."""
+
+    def __init__(self):
+        self.itens = []
+        self._lock = threading.Lock()
+
+    def registrar(self, tipo, segundos, ok):
+        with self._lock:
+            self.itens.append((tipo, segundos, ok))
+
+
+class _Conexao:
+    def __init__(self, porta):
+        self.porta = porta
+        self._http = None
+
+    def enviar(self, metodo, caminho, corpo=None):
+        """(status, resposta decodificada ou None); reconecta se preciso."""
+        cabecalhos = {"Accept-Encoding": "gzip"}
+        dados = None
+        if corpo is not None:
+            dados = json.dumps(corpo).encode("utf-8")
+            cabecalhos["Content-Type"] = "application/json"
+
+        for tentativa in (1, 2):
+            if self._http is None:
+                self._http = http.client.HTTPConnection(
+                    "127.0.0.1", self.porta, timeout=300
+                )
+            try:
+                self._http.request(metodo, caminho, dados, cabecalhos)
+                resposta = self._http.getresponse()
+                conteudo = resposta.read()
+                break
+            except (http.client.HTTPException, OSError):
+                # Conexão mantida pelo servidor foi encerrada
+                self._http.close()
+                self._http = None
+                if tentativa == 2:
+                    raise
+
+        if resposta.getheader("Content-Encoding") == "gzip":
+            conteudo = gzip.decompress(conteudo)
+        if resposta.getheader("Content-Type", "").startswith("application/json"):
+            return resposta.status, json.loads(conteudo)
+        return resposta.status, None
+
+    def fechar(self):
+        if self._http is not None:
+            self._http.close()
+
+
+class UsuarioVirtual:
+    """Uma pessoa na página de contratos, repetindo ações até o prazo.
+
+    Tabela e opções disparam juntas a cada mudança de filtro, em duas
+    conexões, como no navegador.
+    """
+
+    def __init__(self, porta, medicoes, auxiliar, semente, probabilidade_pdf):
+        self.medicoes = medicoes
+        self.auxiliar = auxiliar
+        self.aleatorio = random.Random(semente)
+        self.probabilidade_pdf = probabilidade_pdf
+        self._conexao = _Conexao(porta)
+        self._conexao_paralela = _Conexao(porta)
+        self.callbacks = None
+        self.valores = {}
+        self.opcoes = {}
+
+    # ---------- requisições ----------
+    def _medir(self, tipo, conexao, metodo, caminho, corpo=None):
+        inicio = time.perf_counter()
+        try:
+            status, resposta = conexao.enviar(metodo, caminho, corpo)
+        except (http.client.HTTPException, OSError):
+            self.medicoes.registrar(tipo, time.perf_counter() - inicio, False)
+            return None, None
+        ok = status < 400
+        self.medicoes.registrar(tipo, time.perf_counter() - inicio, ok)
+        return status, resposta
+
+    def _aplicar(self, resposta):
+        """Guarda os valores devolvidos pelo callback (estado do navegador)."""
+        if not resposta or "response" not in resposta:
+            return
+        for id_, propriedades in resposta["response"].items():
+            for prop, valor in propriedades.items():
+                self.valores[(id_, prop)] = valor
+                if prop == "options":
+                    self.opcoes[id_] = [o["value"] for o in valor]
+
+    def _callback(self, tipo, nome, disparos, conexao=None):
+        corpo = corpo_callback(self.callbacks[nome], self.valores, disparos)
+        _, resposta = self._medir(
+            tipo, conexao or self._conexao, "POST", ROTA_CALLBACKS, corpo
+        )
+        return resposta
+
+    def _filtros_mudaram(self, disparos, pagina=False):
+        """Tabela e opções em paralelo; depois os links de exportação."""
+        paralela = None
+        if not pagina:
+            paralela = self.auxiliar.submit(
+                self._callback,
+                "opcoes",
+                "filtro_setor",
+                disparos,
+                self._conexao_paralela,
+            )
+        self._aplicar(self._callback("tabela", "tabela_contratos", disparos))
+        if paralela is not None:
+            self._aplicar(paralela.result())
+        self._aplicar(
+            self._callback(
+                "links", "link_exportar_csv_contratos", ["store_dados_contratos.data"]
+            )
+        )
+
+    # ---------- ações ----------
+    def abrir_pagina(self):
+        self.valores = {(i, "value"): None for i in IDS_FILTROS}
+        self.valores[("url", "pathname")] = "/contratos"
+        self.valores[("interval-atualizacao", "n_intervals")] = 0
+        self.valores[("tabela_contratos", "page_current")] = 0
+        self.valores[("tabela_contratos", "page_size")] = 50
+
+        self._medir("pagina", self._conexao, "GET", "/contratos")
+        self._medir("pagina", self._conexao, "GET", "/_dash-layout")
+        _, dependencias = self._medir(
+            "pagina", self._conexao, "GET", "/_dash-dependencies"
+        )
+        self.callbacks = indexar_dependencias(dependencias)
+
+        self._aplicar(self._callback("menu", "sidebar-menu", ["url.pathname"]))
+        self._aplicar(
+            self._callback(
+                "versao", "store_versao_contratos", ["interval-atualizacao.n_intervals"]
+            )
+        )
+        self._filtros_mudaram(["store_versao_contratos.data"])
+
+    def digitar(self, campo, termo):
+        for i in range(1, len(termo) + 1):
+            self.valores[(campo, "value")] = termo[:i]
+            self._filtros_mudaram([f"{campo}.value"])
+            time.sleep(INTERVALO_TECLA * self.aleatorio.uniform(0.5, 1.5))
+
+    def escolher(self, campo):
+        disponiveis = self.opcoes.get(campo) or []
+        if not disponiveis:
+            return
+        escolhidos = self.aleatorio.sample(
+            disponiveis, min(len(disponiveis), self.aleatorio.randint(1, 2))
+        )
+        self.valores[(campo, "value")] = escolhidos
+        self._filtros_mudaram([f"{campo}.value"])
+
+    def escolher_status(self):
+        self.valores[("filtro_status_vig", "value")] = [
+            self.aleatorio.choice(["Vigente", "Próximo do Vencimento", "Vencido"])
+        ]
+        self._filtros_mudaram(["filtro_status_vig.value"])
+
+    def paginar(self):
+        contagem = self.valores.get(("tabela_contratos", "page_count")) or 1
+        self.valores[("tabela_contratos", "page_current")] = self.aleatorio.randrange(
+            contagem
+        )
+        self._filtros_mudaram(["tabela_contratos.page_current"], pagina=True)
+
+    def limpar(self):
+        self.valores[("btn_limpar_filtros_contratos", "n_clicks")] = 1
+        self._aplicar(
+            self._callback(
+                "limpar", "filtro_contrato", ["btn_limpar_filtros_contratos.n_clicks"]
+            )
+        )
+        self._filtros_mudaram([f"{i}.value" for i in IDS_FILTROS])
+
+    def baixar_pdf(self, espera=120):
+        """Dispara o callback em segundo plano e consulta até o arquivo chegar.
+
+        Enquanto o job roda, a consulta responde 200 sem "response". Todo
+        pedido deve receber o PDF: um 204 (job encerrado sem resultado), um
+        erro ou o fim da espera contam como erro do tipo "pdf".
+        """
+        dep = self.callbacks["download_relatorio_contratos"]
+        intervalo = dep["long"]["interval"] / 1000
+        # O pedido único que o navegador gera a cada clique
+        # (novoPedidoRelatorio em assets/contratos_filtros.js)
+        self.valores[("store_pedido_relatorio_contratos", "data")] = uuid.uuid4().hex
+        corpo = corpo_callback(
+            dep, self.valores, ["store_pedido_relatorio_contratos.data"]
+        )
+
+        inicio = time.perf_counter()
+        try:
+            status, resposta = self._conexao.enviar("POST", ROTA_CALLBACKS, corpo)
+            if status == 200 and resposta and "cacheKey" in resposta:
+                consulta = (
+                    f"{ROTA_CALLBACKS}?cacheKey={resposta['cacheKey']}"
+                    f"&job={resposta['job']}"
+                )
+                limite = time.monotonic() + espera
+                while time.monotonic() < limite:
+                    time.sleep(intervalo)
+                    status, resposta = self._conexao.enviar("POST", consulta, corpo)
+                    if status != 200 or (resposta and "response" in resposta):
+                        break
+        except (http.client.HTTPException, OSError) as erro:
+            status, resposta = repr(erro), None
+        segundos = time.perf_counter() - inicio
+
+        entregue = status == 200 and bool(resposta) and "response" in resposta
+        self.medicoes.registrar("pdf", segundos, entregue)
+        if not entregue:
+            print(
+                f"PDF não entregue após {segundos:.1f} s (status {status})",
+                file=sys.stderr,
+            )
+
+    def _termo_contrato(self):
+        return f"{self.aleatorio.randint(1, 999):03d}/20"
+
+    def _termo_objeto(self):
+        return self.aleatorio.choice(PALAVRAS)[: self.aleatorio.randint(4, 9)]
+
+    # ---------- sessão ----------
+    def executar(self, prazo):
+        acoes = [
+            (3, lambda: self.digitar("filtro_objeto", self._termo_objeto())),
+            (2, lambda: self.digitar("filtro_contrato", self._termo_contrato())),
+            (2, lambda: self.escolher("filtro_setor")),
+            (1, lambda: self.escolher("filtro_empresa")),
+            (1, self.escolher_status),
+            (2, self.paginar),
+            (1, self.limpar),
+        ]
+        pesos = [peso for peso, _ in acoes]
+        try:
+            self.abrir_pagina()
+            while time.monotonic() < prazo:
+                if self.aleatorio.random() < self.probabilidade_pdf:
+                    self.baixar_pdf()
+                else:
+                    self.aleatorio.choices(acoes, pesos)[0][1]()
+                time.sleep(self.aleatorio.uniform(*PAUSA_ACAO))
+        finally:
+            self._conexao.fechar()
+            self._conexao_paralela.fechar()
+
+
+# --------------------------------------------------
+# Níveis de concorrência
+# --------------------------------------------------
+def percentil(valores, p):
+    """Percentil pelo posto mais próximo (valores já ordenados)."""
+    if not valores:
+        return None
+    posicao = max(0, min(len(valores) - 1, -(-len(valores) * p // 100) - 1))
+    return valores[int(posicao)]
+
+
+def resumir(itens, segundos):
+    tempos = sorted(s for _, s, ok in itens if ok)
+    return {
+        "requisicoes": len(itens),
+        "erros": sum(1 for _, _, ok in itens if not ok),
+        "vazao_rps": len(itens) / segundos if segundos else None,
+        "p50_s": percentil(tempos, 50),
+        "p95_s": percentil(tempos, 95),
+        "p99_s": percentil(tempos, 99),
+        "max_s": tempos[-1] if tempos else None,
+    }
+
+
+def rodar_nivel(porta, n_usuarios, duracao, probabilidade_pdf, semente):
+    medicoes = Medicoes()
+    prazo = time.monotonic() + duracao
+    inicio = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=n_usuarios) as auxiliar:
+        usuarios = [
+            UsuarioVirtual(porta, medicoes, auxiliar, semente + i, probabilidade_pdf)
+            for i in range(n_usuarios)
+        ]
+        falhas = []
+
+        def executar(usuario):
+            try:
+                usuario.executar(prazo)
+            except Exception as erro:
+                falhas.append(f"{type(erro).__name__}: {erro}")
+
+        threads = [
+            threading.Thread(target=executar, args=(u,), daemon=True) for u in usuarios
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    segundos = time.perf_counter() - inicio
+
+    interativos = [item for item in medicoes.itens if item[0] in TIPOS_INTERATIVOS]
+    return {
+        "usuarios": n_usuarios,
+        "segundos": segundos,
+        # Usuários interrompidos por um erro inesperado (a sessão termina)
+        "falhas": falhas,
+        "interativos": resumir(interativos, segundos),
+        "por_tipo": {
+            tipo: resumir(
+                [item for item in medicoes.itens if item[0] == tipo], segundos
+            )
+            for tipo in sorted({item[0] for item in medicoes.itens})
+        },
+    }
+
+
+def _ms(valor):
+    return f"{valor * 1000:8.1f}" if valor is not None else f"{'-':>8}"
+
+
+def imprimir(configuracao, nivel):
+    r = nivel["interativos"]
+    pdf = nivel["por_tipo"].get("pdf", {})
+    print(
+        f"{configuracao['workers'] or '-':>7} {configuracao['threads'] or '-':>7} "
+        f"{nivel['usuarios']:>8} {r['vazao_rps']:8.1f} "
+        f"{_ms(r['p50_s'])} {_ms(r['p95_s'])} {_ms(r['p99_s'])} "
+        f"{r['erros']:>6} {pdf.get('requisicoes', 0):>5} {pdf.get('erros', 0):>7} "
+        f"{_ms(pdf.get('p95_s'))}",
+        flush=True,
+    )
+
+
+# --------------------------------------------------
+# Execução
+# --------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=10000)
+    parser.add_argument("--usuarios", type=int, nargs="+", default=NIVEIS_USUARIOS)
+    parser.add_argument("--duracao", type=float, default=20, help="segundos por nível")
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[None], help="padrão: gunicorn.conf"
+    )
+    parser.add_argument(
+        "--threads", type=int, nargs="+", default=[None], help="padrão: gunicorn.conf"
+    )
+    parser.add_argument("--pdf", type=float, default=PROBABILIDADE_PDF)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", help="arquivo JSON de resultados")
+    args = parser.parse_args()
+
+    revisao = revisao_git()
+    saida = args.saida or os.path.join(
+        DIR_RESULTADOS, f"carga-{revisao or 'local'}.json"
+    )
+
+    print(
+        f"{'workers':>7} {'threads':>7} {'usuarios':>8} {'req/s':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'erros':>6} "
+        f"{'pdfs':>5} {'pdf err':>7} {'pdf p95':>8}"
+    )
+
+    configuracoes = []
+    try:
+        with tempfile.TemporaryDirectory() as pasta:
+            salvar_csv(
+                gerar_planilha(args.linhas), os.path.join(pasta, "contratos.csv")
+            )
+            with ServidorPlanilha(pasta) as servidor:
+                for workers in args.workers:
+                    for threads in args.threads:
+                        niveis = []
+                        configuracao = {
+                            "workers": workers,
+                            "threads": threads,
+                            "niveis": niveis,
+                        }
+                        # Já listada: os níveis medidos entram mesmo se a
+                        # execução parar no meio
+                        configuracoes.append(configuracao)
+                        with AppGunicorn(
+                            servidor.url("contratos.csv"), pasta, workers, threads
+                        ) as app:
+                            for n_usuarios in args.usuarios:
+                                nivel = rodar_nivel(
+                                    app.porta,
+                                    n_usuarios,
+                                    args.duracao,
+                                    args.pdf,
+                                    args.semente,
+                                )
+                                niveis.append(nivel)
+                                imprimir(configuracao, nivel)
+    finally:
+        os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+        with open(saida, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "revisao": revisao,
+                    "gerado_em": datetime.now().isoformat(timespec="seconds"),
+                    "cpus": os.cpu_count(),
+                    "linhas": args.linhas,
+                    "duracao_nivel_s": args.duracao,
+                    "probabilidade_pdf": args.pdf,
+                    "configuracoes": configuracoes,
+                },
+                f,
+                ensure_ascii=False,
+                indent=1,
+            )
+        print(f"\nResultados em {saida}")
+
+    niveis = [nivel for c in configuracoes for nivel in c["niveis"]]
+    pdfs_perdidos = sum(n["por_tipo"].get("pdf", {}).get("erros", 0) for n in niveis)
+    falhas = [falha for n in niveis for falha in n["falhas"]]
+    if pdfs_perdidos or falhas:
+        print(
+            f"{pdfs_perdidos} PDF(s) não entregue(s), {len(falhas)} usuário(s) "
+            "interrompido(s)",
+            file=sys.stderr,
+        )
+        for falha in falhas:
+            print(f"  {falha}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+from servicos.dados_contratos import (
+    COL_CONTRATO,
+    COL_EMPRESA,
+    COL_INICIO_VIG,
+    COL_LINK_COMPRASNET,
+    COL_MENU_GRUPO,
+    COL_OBJETO_ORIG,
+    COL_SETOR,
+    COL_TERMINO_EXEC,
+    COL_TERMINO_VIG,
+    GRUPO_FIXO,
+)
+
+
+SETORES = [
+    "PROAD",
+    "PRPPG",
+    "PROEX",
+    "PROGRAD",
+    "DCC",
+    "DIRAD",
+    "ICT",
+    "IEM",
+    "IESTI",
+    "IFQ",
+]
+
+GRUPOS = [GRUPO_FIXO] * 8 + ["SERVIÇOS CONTÍNUOS", "OBRAS"]
+
+PALAVRAS = (
+    "apoio gestão administrativa financeira projeto pesquisa extensão inovação "
+    "tecnológica convênio execução desenvolvimento institucional laboratório "
+    "capacitação serviços aquisição manutenção energia ação programa"
+).split()
+
+
+# --------------------------------------------------
+# Planilha sintética com os nomes reais das colunas
+# --------------------------------------------------
+def gerar_planilha(n_linhas, semente=0, n_empresas=None):
+    """DataFrame no formato do CSV da planilha de contratos."""
+    rng = np.random.default_rng(semente)
+    n_empresas = n_empresas or max(5, min(2000, n_linhas // 20))
+
+    empresas = np.array(
+        [
+            f"FUNDAÇÃO DE APOIO {i:04d} - PESQUISA E INOVAÇÃO LTDA"
+            for i in range(n_empresas)
+        ],
+        dtype=object,
+    )
+    palavras = np.array(PALAVRAS, dtype=object)
+
+    hoje = pd.Timestamp.today().normalize()
+    inicio = hoje - pd.to_timedelta(rng.integers(30, 1500, n_linhas), unit="D")
+    termino = hoje + pd.to_timedelta(rng.integers(-400, 800, n_linhas), unit="D")
+    termino_vig = termino + pd.to_timedelta(30, unit="D")
+
+    n_palavras = rng.integers(4, 16, n_linhas)
+    sorteio = rng.integers(0, len(palavras), (n_linhas, 16))
+    objetos = [
+        " ".join(palavras[sorteio[i, : n_palavras[i]]]).capitalize()
+        for i in range(n_linhas)
+    ]
+
+    termino_txt = pd.Series(termino.strftime("%d/%m/%Y"))
+    sem_termino = rng.random(n_linhas) < 0.02
+    termino_txt[sem_termino] = ""
+
+    links = np.where(
+        rng.random(n_linhas) < 0.7,
+        [
+            f"https://contratos.comprasnet.gov.br/transparencia/contratos/{i}"
+            for i in range(n_linhas)
+        ],
+        "",
+    )
+
+    return pd.DataFrame(
+        {
+            COL_CONTRATO: [
+                f"{a:03d}/{b}"
+                for a, b in zip(
+                    rng.integers(1, 999, n_linhas), rng.integers(2015, 2027, n_linhas)
+                )
+            ],
+            COL_SETOR: rng.choice(SETORES, n_linhas),
+            COL_MENU_GRUPO: rng.choice(GRUPOS, n_linhas),
+            COL_OBJETO_ORIG: objetos,
+            COL_EMPRESA: empresas[rng.integers(0, n_empresas, n_linhas)],
+            COL_INICIO_VIG: inicio.strftime("%d/%m/%Y"),
+            COL_TERMINO_EXEC: termino_txt,
+            COL_TERMINO_VIG: np.where(
+                sem_termino, "", termino_vig.strftime("%d/%m/%Y")
+            ),
+            COL_LINK_COMPRASNET: links,
+        }
+    )
+
+
+def salvar_csv(df, caminho):
+    """Grava a planilha sintética como o CSV exportado pelo Google Sheets."""
+    df.to_csv(caminho, index=False)
+    return caminho
@@ -0,0 +1,343 @@
+"""Tempos de carga, filtros, opções, serialização e PDF com planilhas sintéticas.
+
+Uso (a partir da raiz do repositório):
+
+    python -m benchmarks.desempenho_contratos
+    python -m benchmarks.desempenho_contratos --linhas 100 10000 --repeticoes 5
+    python -m benchmarks.desempenho_contratos --comparar antes.json depois.json
+
+A planilha de cada tamanho é servida por HTTP local no lugar de
+URL_CONTRATOS. Cada etapa é medida "fria" (primeira execução, caches vazios)
+e "quente" (repetições seguintes, caches preenchidos). O resultado vai para
+um JSON (por padrão em benchmarks/resultados/) a ser comparado entre versões.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import servicos.cache_relatorios as cache_relatorios
+import servicos.consulta_contratos as consulta
+import servicos.dados_contratos as dados
+from benchmarks.dados_sinteticos import gerar_planilha, salvar_csv
+from benchmarks.requisicoes_dash import (
+    ROTA_CALLBACKS,
+    corpo_callback,
+    indexar_dependencias,
+)
+from benchmarks.servidor_planilha import ServidorPlanilha
+from rotas.api import registros_api
+from servicos.relatorio_contratos import (
+    carimbar_data_hora,
+    montar_modelo_pdf_contratos,
+)
+
+
+TAMANHOS = [100, 1000, 10000, 100000, 1000000]
+
+DIR_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+
+# Filtros da página, na ordem de normalizar_filtros
+NOMES_FILTROS = ["contrato", "objeto", "setor", "grupo", "empresa", "status"]
+
+# Linhas do relatório PDF medido (o PDF de 1M linhas não é um caso real)
+MAX_LINHAS_PDF = 2000
+
+# Diferença (quente) a partir da qual a comparação destaca a etapa
+LIMIAR_COMPARACAO = 0.10
+
+
+# --------------------------------------------------
+# Medição
+# --------------------------------------------------
+def medir(funcao, repeticoes, esfriar=None):
+    """Tempo da 1ª execução (depois de `esfriar`) e das `repeticoes` seguintes."""
+    if esfriar is not None:
+        esfriar()
+    inicio = time.perf_counter()
+    resultado = funcao()
+    frio = time.perf_counter() - inicio
+
+    quentes = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        quentes.append(time.perf_counter() - inicio)
+
+    return resultado, {
+        "frio_s": frio,
+        "quente_mediana_s": statistics.median(quentes) if quentes else None,
+        "quente_min_s": min(quentes) if quentes else None,
+        "quente_max_s": max(quentes) if quentes else None,
+    }
+
+
+def _limpar_cache_filtros():
+    consulta._cache_filtros.limpar()
+
+
+# --------------------------------------------------
+# Casos
+# --------------------------------------------------
+def valores_filtros(base):
+    """Um valor representativo por filtro, escolhido nos dados sintéticos."""
+    empresas = base.bitmaps["Empresa Contratada"].categorias[:2]
+    return {
+        "contrato": "/2020",
+        "objeto": "pesquisa",
+        "setor": ["DCC", "PROAD"],
+        "grupo": [dados.GRUPO_FIXO],
+        "empresa": list(empresas),
+        "status": ["Vigente"],
+    }
+
+
+def combinacoes_filtros(base):
+    """Todas as combinações de filtros ativos (2^6), com nome legível."""
+    valores = valores_filtros(base)
+    for ativos in itertools.product([False, True], repeat=len(NOMES_FILTROS)):
+        nomes = [n for n, ativo in zip(NOMES_FILTROS, ativos) if ativo]
+        argumentos = [
+            valores[n] if ativo else ("" if n in ("contrato", "objeto") else [])
+            for n, ativo in zip(NOMES_FILTROS, ativos)
+        ]
+        yield "+".join(nomes) or "nenhum", argumentos
+
+
+IDS_FILTROS = [
+    "filtro_contrato",
+    "filtro_objeto",
+    "filtro_setor",
+    "filtro_grupo",
+    "filtro_empresa",
+    "filtro_status_vig",
+]
+
+
+def _corpo_tabela(callbacks, argumentos, versao):
+    """Requisição do callback da tabela, como o navegador a envia."""
+    valores = {(i, "value"): valor for i, valor in zip(IDS_FILTROS, argumentos)}
+    valores[("store_versao_contratos", "data")] = versao
+    valores[("tabela_contratos", "page_current")] = 0
+    valores[("tabela_contratos", "page_size")] = 50
+    return corpo_callback(
+        callbacks["tabela_contratos"], valores, ["filtro_objeto.value"]
+    )
+
+
+def _app():
+    """App Dash importado só depois de haver uma versão publicada."""
+    # Sem thread de atualização baixando a planilha durante as medições
+    dados.ADIAR_ATUALIZADOR = True
+    import app
+
+    from pages.contratos import opcoes_filtros
+
+    return app.server.test_client(), opcoes_filtros
+
+
+# --------------------------------------------------
+# Execução por tamanho
+# --------------------------------------------------
+def medir_tamanho(n_linhas, servidor, pasta, repeticoes):
+    resultados = []
+
+    def registrar(etapa, caso, medidas, **extras):
+        item = {"linhas": n_linhas, "etapa": etapa, "caso": caso, **medidas, **extras}
+        resultados.append(item)
+        print(
+            f"{n_linhas:>8} {etapa:<22} {caso:<40} "
+            f"frio {item['frio_s'] * 1000:9.2f} ms  "
+            f"quente {(item['quente_mediana_s'] or 0) * 1000:9.2f} ms",
+            flush=True,
+        )
+
+    nome = f"contratos_{n_linhas}.csv"
+    salvar_csv(gerar_planilha(n_linhas), os.path.join(pasta, nome))
+    dados.URL_CONTRATOS = servidor.url(nome)
+    dados.ARQUIVO_SNAPSHOT = os.path.join(pasta, f"contratos_{n_linhas}.pkl")
+
+    # Carga: download + tratamento, snapshot local e índices
+    df, medidas = medir(dados.carregar_dados_contratos, repeticoes)
+    registrar("carga_planilha", "http", medidas)
+    _, medidas = medir(dados.carregar_snapshot, repeticoes)
+    registrar("carga_snapshot", "pickle", medidas)
+    base, medidas = medir(lambda: dados.construir_base(df), repeticoes)
+    registrar("indexacao", "construir_base", medidas, linhas_base=len(base.df))
+
+    base = dados.publicar_base(base)
+    cliente, opcoes_filtros = _app()
+    callbacks = indexar_dependencias(cliente.get("/_dash-dependencies").get_json())
+
+    for caso, argumentos in combinacoes_filtros(base):
+        filtros = consulta.normalizar_filtros(*argumentos)
+        (_, linhas), medidas = medir(
+            lambda: consulta.consultar_linhas(filtros, base),
+            repeticoes,
+            esfriar=_limpar_cache_filtros,
+        )
+        registrar("filtros", caso, medidas, linhas_resultado=len(linhas))
+
+        _, medidas = medir(
+            lambda: opcoes_filtros(*argumentos),
+            repeticoes,
+            esfriar=_limpar_cache_filtros,
+        )
+        registrar("opcoes", caso, medidas)
+
+    # Serialização: callback da tabela (Dash, ponta a ponta) e página da API
+    for caso, argumentos in (
+        ("nenhum", ["", "", [], [], [], []]),
+        ("todos", list(combinacoes_filtros(base))[-1][1]),
+    ):
+        corpo = _corpo_tabela(callbacks, argumentos, base.versao)
+        resposta, medidas = medir(
+            lambda: cliente.post(ROTA_CALLBACKS, json=corpo),
+            repeticoes,
+            esfriar=_limpar_cache_filtros,
+        )
+        registrar("tabela_callback", caso, medidas, bytes=len(resposta.data))
+
+    _, linhas = consulta.consultar_linhas(consulta.normalizar_filtros(*[""] * 6), base)
+    pagina = base.df.iloc[linhas[:1000]]
+    texto, medidas = medir(lambda: json.dumps(registros_api(pagina)), repeticoes)
+    registrar("registros_api", "1000 linhas", medidas, bytes=len(texto))
+
+    # PDF: renderização (cache vazio) e reaproveitamento do modelo (cache)
+    filtros = consulta.criar_consulta(
+        consulta.normalizar_filtros(*[""] * 6), base.versao
+    )["filtros"]
+    df_pdf = dados.formatar_para_exibicao(base.df.iloc[linhas[:MAX_LINHAS_PDF]])
+
+    def gerar_pdf():
+        modelo = cache_relatorios.obter_relatorio(base.versao, filtros)
+        if modelo is None:
+            modelo = montar_modelo_pdf_contratos(df_pdf)
+            cache_relatorios.guardar_relatorio(base.versao, filtros, modelo)
+        return carimbar_data_hora(modelo)
+
+    pdf, medidas = medir(
+        gerar_pdf,
+        repeticoes,
+        esfriar=lambda: shutil.rmtree(cache_relatorios.DIR_RELATORIOS, True),
+    )
+    registrar(
+        "pdf",
+        f"{len(df_pdf)} linhas",
+        medidas,
+        linhas_resultado=len(df_pdf),
+        bytes=len(pdf),
+    )
+
+    return resultados
+
+
+# --------------------------------------------------
+# Comparação entre duas execuções
+# --------------------------------------------------
+def comparar(caminho_antes, caminho_depois):
+    with open(caminho_antes, encoding="utf-8") as f:
+        antes = json.load(f)
+    with open(caminho_depois, encoding="utf-8") as f:
+        depois = json.load(f)
+
+    def chave(item):
+        return item["linhas"], item["etapa"], item["caso"]
+
+    anteriores = {chave(item): item for item in antes["resultados"]}
+    print(
+        f"{antes.get('revisao') or caminho_antes} -> "
+        f"{depois.get('revisao') or caminho_depois} (quente, mediana)\n"
+    )
+    for item in depois["resultados"]:
+        anterior = anteriores.get(chave(item))
+        if anterior is None or not anterior["quente_mediana_s"]:
+            continue
+        razao = item["quente_mediana_s"] / anterior["quente_mediana_s"]
+        marca = ""
+        if razao > 1 + LIMIAR_COMPARACAO:
+            marca = "  mais lento"
+        elif razao < 1 - LIMIAR_COMPARACAO:
+            marca = "  mais rápido"
+        print(
+            f"{item['linhas']:>8} {item['etapa']:<22} {item['caso']:<40} "
+            f"{anterior['quente_mediana_s'] * 1000:9.2f} -> "
+            f"{item['quente_mediana_s'] * 1000:9.2f} ms  x{razao:.2f}{marca}"
+        )
+
+
+# --------------------------------------------------
+# Execução
+# --------------------------------------------------
+def revisao_git():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, nargs="+", default=TAMANHOS)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--saida", help="arquivo JSON de resultados")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DEPOIS"))
+    args = parser.parse_args()
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+
+    revisao = revisao_git()
+    saida = args.saida or os.path.join(
+        DIR_RESULTADOS, f"desempenho-{revisao or 'local'}.json"
+    )
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as pasta:
+        # Caches de relatórios e snapshot fora da pasta do app
+        cache_relatorios.DIR_RELATORIOS = os.path.join(pasta, "relatorios")
+        with ServidorPlanilha(pasta) as servidor:
+            for n_linhas in sorted(args.linhas):
+                resultados.extend(
+                    medir_tamanho(n_linhas, servidor, pasta, args.repeticoes)
+                )
+
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "revisao": revisao,
+                "gerado_em": datetime.now().isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "pandas": pd.__version__,
+                "plataforma": platform.platform(),
+                "cpus": os.cpu_count(),
+                "repeticoes": args.repeticoes,
+                "resultados": resultados,
+            },
+            f,
+            ensure_ascii=False,
+            indent=1,
+        )
+    print(f"\nResultados em {saida}")
+
+
+if __name__ == "__main__":
+    main()
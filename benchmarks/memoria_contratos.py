@@ -0,0 +1,78 @@
+"""Relatório de memória por worker: representação antiga (object) x tipada.
+
+Uso (a partir da raiz do repositório):
+
+    python -m benchmarks.memoria_contratos --linhas 10000 --workers 4
+    python -m benchmarks.memoria_contratos --csv caminho_ou_url.csv
+"""
+
+import argparse
+import os
+import tempfile
+
+import servicos.dados_contratos as dados
+from benchmarks.dados_sinteticos import gerar_planilha, salvar_csv
+
+
+def _mb(n_bytes):
+    return n_bytes / (1024 * 1024)
+
+
+def memoria_indices(base):
+    """Bytes ocupados pelos índices derivados de uma versão dos dados."""
+    total = 0
+    for indice in (base.indice_contrato, base.indice_objeto):
+        total += sum(linhas.nbytes for linhas in indice.postagens.values())
+        total += sum(len(texto) + 49 for texto in indice.textos)
+    for indice in base.bitmaps.values():
+        total += sum(bits.nbytes for bits in indice.bitsets.values())
+        total += indice.codigos.nbytes
+    return total + base.bits_validos.nbytes
+
+
+def representacao_antiga(df):
+    """Reproduz o DataFrame anterior: datas como texto e colunas object."""
+    return dados.formatar_para_exibicao(df).drop(columns=["Contrato_Link"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", help="CSV (caminho ou URL) no formato da planilha")
+    parser.add_argument("--linhas", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        dados.URL_CONTRATOS = args.csv or salvar_csv(
+            gerar_planilha(args.linhas), os.path.join(pasta, "contratos.csv")
+        )
+        dados.ARQUIVO_SNAPSHOT = os.path.join(pasta, "contratos.pkl")
+        base = dados.construir_base(dados.carregar_dados_contratos())
+
+    antiga = representacao_antiga(base.df).memory_usage(deep=True)
+    tipada = base.df.drop(columns=["Contrato_Link"]).memory_usage(deep=True)
+    indices = memoria_indices(base)
+
+    print(f"Linhas: {len(base.df)}   Workers: {args.workers}\n")
+    print(f"{'Coluna':<24}{'Antes (MB)':>12}{'Depois (MB)':>13}")
+    for col in tipada.index:
+        if col == "Index":
+            continue
+        print(f"{col:<24}{_mb(antiga[col]):>12.2f}{_mb(tipada[col]):>13.2f}")
+
+    total_antes = antiga.sum()
+    total_depois = tipada.sum()
+    print(f"{'DataFrame':<24}{_mb(total_antes):>12.2f}{_mb(total_depois):>13.2f}")
+    print(f"{'Índices (só depois)':<24}{'':>12}{_mb(indices):>13.2f}")
+    print(
+        f"\nPor worker: {_mb(total_antes):.2f} MB -> "
+        f"{_mb(total_depois + indices):.2f} MB (dados + índices)"
+    )
+    print(
+        f"Por host ({args.workers} workers): {_mb(total_antes * args.workers):.2f} MB"
+        f" -> {_mb((total_depois + indices) * args.workers):.2f} MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
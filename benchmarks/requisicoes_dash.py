@@ -0,0 +1,55 @@
+"""Requisições `_dash-update-component` montadas como o navegador as envia."""
+
+ROTA_CALLBACKS = "/_dash-update-component"
+
+
+def _saidas(texto):
+    """("id", "propriedade") de cada saída da string `output` do Dash."""
+    if texto.startswith(".."):
+        partes = texto[2:-2].split("...")
+    else:
+        partes = [texto]
+    return [tuple(parte.rsplit(".", 1)) for parte in partes]
+
+
+def indexar_dependencias(dependencias):
+    """Callbacks de `/_dash-dependencies` indexados pelo id da 1ª saída."""
+    callbacks = {}
+    for dep in dependencias:
+        if dep.get("clientside_function"):
+            continue
+        callbacks.setdefault(_saidas(dep["output"])[0][0], dep)
+    return callbacks
+
+
+def corpo_callback(dep, valores, disparos=()):
+    """Corpo da chamada de um callback.
+
+    `valores` traz o valor atual de cada ("id", "propriedade") usado pelo
+    callback (ausentes vão como None); `disparos`, as propriedades que
+    mudaram, no formato "id.propriedade".
+    """
+    saidas = [
+        {"id": id_, "property": prop.split("@")[0]}
+        for id_, prop in _saidas(dep["output"])
+    ]
+
+    def itens(dependencias):
+        return [
+            {
+                "id": d["id"],
+                "property": d["property"],
+                "value": valores.get((d["id"], d["property"])),
+            }
+            for d in dependencias
+        ]
+
+    corpo = {
+        "output": dep["output"],
+        "outputs": saidas if dep["output"].startswith("..") else saidas[0],
+        "inputs": itens(dep["inputs"]),
+        "changedPropIds": list(disparos),
+    }
+    if dep["state"]:
+        corpo["state"] = itens(dep["state"])
+    return corpo
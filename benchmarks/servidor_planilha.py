@@ -0,0 +1,91 @@
+"""Servidor HTTP local no lugar da planilha do Google (CSV sintético).
+
+Uso (a partir da raiz do repositório):
+
+    python -m benchmarks.servidor_planilha --linhas 10000 --porta 8071
+
+e então `CONTRATOS_URL_PLANILHA=http://127.0.0.1:8071/contratos.csv`.
+"""
+
+import argparse
+import functools
+import os
+import tempfile
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.dados_sinteticos import gerar_planilha, salvar_csv
+
+
+class _Arquivos(SimpleHTTPRequestHandler):
+    def log_message(self, formato, *args):
+        # Sem log por requisição (atrapalharia as medições)
+        pass
+
+
+class ServidorPlanilha:
+    """Serve os arquivos de `pasta` por HTTP numa thread, enquanto aberto.
+
+    Com `porta=0`, o sistema escolhe uma porta livre.
+    """
+
+    def __init__(self, pasta, host="127.0.0.1", porta=0):
+        self.pasta = pasta
+        self._servidor = ThreadingHTTPServer(
+            (host, porta), functools.partial(_Arquivos, directory=pasta)
+        )
+        self._thread = None
+
+    @property
+    def endereco(self):
+        host, porta = self._servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def url(self, nome):
+        return f"{self.endereco}/{nome}"
+
+    def iniciar(self):
+        self._thread = threading.Thread(
+            target=self._servidor.serve_forever, name="servidor-planilha", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=10000)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8071)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        salvar_csv(
+            gerar_planilha(args.linhas, semente=args.semente),
+            os.path.join(pasta, "contratos.csv"),
+        )
+        with ServidorPlanilha(pasta, args.host, args.porta) as servidor:
+            print(
+                f"Planilha sintética ({args.linhas} linhas) em "
+                f"{servidor.url('contratos.csv')}",
+                flush=True,
+            )
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                pass
+
+
+if __name__ == "__main__":
+    main()
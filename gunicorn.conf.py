@@ -0,0 +1,77 @@
+"""Configuração de produção do gunicorn.
+
+Uso (a partir da raiz do repositório):
+
+    gunicorn -c gunicorn.conf.py
+
+Com `preload_app`, o processo mestre importa o app, carrega e indexa os dados
+uma única vez e os workers herdam essa memória via fork (copy-on-write).
+Depois do fork, um único processo do host atualiza os dados e grava cada
+versão num arquivo Arrow mapeado pelos demais (servicos/base_compartilhada.py).
+"""
+
+import glob
+import multiprocessing
+import os
+import shutil
+
+# Precisam valer antes de o app ser importado (preload)
+os.environ.setdefault("CONTRATOS_ADIAR_ATUALIZADOR", "1")
+# Um único atualizador por host; os workers mapeiam a versão gravada em Arrow
+os.environ.setdefault("CONTRATOS_BASE_COMPARTILHADA", "1")
+# Métricas de todos os processos somadas no /metrics (prometheus_client).
+# Valores de execuções anteriores não podem ser somados aos novos: a pasta
+# padrão é recriada; numa pasta escolhida pelo operador, só os .db saem.
+if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+    for _arquivo in glob.glob(
+        os.path.join(os.environ["PROMETHEUS_MULTIPROC_DIR"], "*.db")
+    ):
+        os.remove(_arquivo)
+else:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(
+        os.environ.get(
+            "CONTRATOS_DIR_CACHE",
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache"),
+        ),
+        "metricas",
+    )
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+wsgi_app = "app:server"
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8052")
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+preload_app = True
+
+accesslog = os.environ.get("GUNICORN_ACCESSLOG", "-")
+loglevel = os.environ.get("GUNICORN_LOGLEVEL", "info")
+
+
+def when_ready(server):
+    # O app já foi importado (preload): garante a versão mais recente e
+    # congela os objetos antes de criar os workers
+    from servicos.base_compartilhada import preparar_para_fork
+    from servicos.dados_contratos import obter_base
+
+    preparar_para_fork()
+    base = obter_base()
+    server.log.info(
+        "Dados prontos no mestre: versão %s (%d linhas)", base.versao, len(base.df)
+    )
+
+
+def post_fork(server, worker):
+    from servicos.base_compartilhada import iniciar_no_worker
+
+    iniciar_no_worker()
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
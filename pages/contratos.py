@@ -1,25 +1,33 @@
 import dash
 from dash import html, dcc, dash_table, Input, Output, State, callback
-import pandas as pd
+from dash import ClientsideFunction, clientside_callback
 from datetime import datetime
 from dash.exceptions import PreventUpdate
-
-from io import BytesIO
-from reportlab.lib.pagesizes import landscape, A4
-from reportlab.lib.units import inch
-from reportlab.platypus import (
-    SimpleDocTemplate,
-    Paragraph,
-    Spacer,
-    Table,
-    TableStyle,
-    Image,
-)
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT
-from reportlab.lib import colors
-from pytz import timezone
+import math
 import os
+from urllib.parse import urlencode
+
+from servicos.cache_relatorios import guardar_relatorio, obter_relatorio
+from servicos.consulta_contratos import (
+    consultar_linhas,
+    contar_facetas,
+    ConsultaDesatualizada,
+    criar_consulta,
+    dados_para_navegador,
+    normalizar_filtros,
+    resolver_consulta,
+)
+from servicos.dados_contratos import (
+    formatar_para_exibicao,
+    iniciar_atualizador,
+    obter_base,
+)
+from servicos.metricas import medir_callback
+from servicos.perfilamento import perfilar
+from servicos.relatorio_contratos import (
+    carimbar_data_hora,
+    montar_modelo_pdf_contratos,
+)
 
 
 # --------------------------------------------------
@@ -42,6 +50,9 @@ def verificar_pagina_contratos():
             "filtro_status_vig",
             "btn_limpar_filtros_contratos",
             "btn_download_relatorio_contratos",
+            "store_pedido_relatorio_contratos",
+            "store_versao_contratos",
+            "tabela_contratos",
         }
 
         # Obtém o ID do componente que disparou o callback
@@ -67,94 +78,32 @@ dash.register_page(
 
 
 # --------------------------------------------------
-# URL da planilha de Contratos
-# --------------------------------------------------
-URL_CONTRATOS = (
-    "https://docs.google.com/spreadsheets/d/"
-    "17nBhvSoCeK3hNgCj2S57q3pF2Uxj6iBpZDvCX481KcU/"
-    "gviz/tq?tqx=out:csv&sheet=Grupo%20da%20Cont."
-)
-
-# Grupo fixo a exibir
-GRUPO_FIXO = "FUNDAÇÃO DE APOIO"
-
-
-# nomes exatos das colunas originais no CSV
-COL_CONTRATO = "Contrato"
-COL_SETOR = "Setor"
-COL_MENU_GRUPO = "MENU Grupo"
-COL_OBJETO_ORIG = (
-    "UNIVERSIDADE FEDERAL DE ITAJUBÁ Diretoria de Compras e Contratos "
-    "Campus Itajubá CONTRATOS ATIVOS - ALIMENTAÇÃO DO BI Objeto"
-)
-COL_EMPRESA = "Empresa Contratada"
-COL_INICIO_VIG = "Início da Vigência"
-COL_TERMINO_EXEC = "Término da Execução"
-COL_TERMINO_VIG = "Termino da Vigência"  # igual na planilha
-COL_LINK_COMPRASNET = "Comprasnet Contratos"
-
-
-# --------------------------------------------------
-# Carga e tratamento dos dados
+# Dados: versão vigente, atualizada em segundo plano
 # --------------------------------------------------
-def carregar_dados_contratos():
-    df = pd.read_csv(URL_CONTRATOS, header=0)
-    df.columns = [c.strip() for c in df.columns]
-
-    if COL_LINK_COMPRASNET not in df.columns:
-        df[COL_LINK_COMPRASNET] = ""
-
-    df = df.rename(
-        columns={
-            COL_CONTRATO: "Contrato",
-            COL_SETOR: "Setor",
-            COL_MENU_GRUPO: "Grupo",
-            COL_OBJETO_ORIG: "Objeto",
-            COL_EMPRESA: "Empresa Contratada",
-            COL_INICIO_VIG: "Início da Vigência",
-            COL_TERMINO_EXEC: "Término da Execução",
-            COL_TERMINO_VIG: "Término da Vigência",
-            COL_LINK_COMPRASNET: "Link Comprasnet",
-        }
-    )
-
-    # ✅ FILTRO FIXO: somente FUNDAÇÃO DE APOIO
-    df = df[df["Grupo"].astype(str).str.strip().str.upper() == GRUPO_FIXO.upper()]
-
-    # Converte datas para datetime para cálculo do status
-    for col in ["Início da Vigência", "Término da Execução", "Término da Vigência"]:
-        if col in df.columns:
-            df[col] = pd.to_datetime(df[col], dayfirst=True, errors="coerce")
-
-    hoje = datetime.now().date()
-
-    def calcular_status(data_termino_exec):
-        if pd.isna(data_termino_exec):
-            return ""
-        dias = (data_termino_exec.date() - hoje).days
-        if dias > 10:
-            return "Vigente"
-        if dias < 0:
-            return "Vencido"
-        return "Próximo do Vencimento"
+# Carga inicial a partir do snapshot local (ou da planilha, se não houver)
+obter_base()
+iniciar_atualizador()
 
-    df["Status da Vigência"] = df["Término da Execução"].apply(calcular_status)
-
-    # Formata datas para string dd/mm/aaaa para exibição
-    for col in ["Início da Vigência", "Término da Execução", "Término da Vigência"]:
-        if col in df.columns:
-            df[col] = df[col].dt.strftime("%d/%m/%Y").fillna("")
-
-    return df
-
-
-df_contratos_base = carregar_dados_contratos()
+# Filtragem no navegador (assets/contratos_filtros.js): a base vai uma vez por
+# versão e o servidor só cuida das atualizações e das exportações
+FILTRO_NO_NAVEGADOR = os.environ.get("CONTRATOS_FILTRO_NO_NAVEGADOR", "0") == "1"
 
 
 # --------------------------------------------------
-# Função auxiliar: filtros em cascata independentes
+# Opções dos filtros com contagem de contratos
 # --------------------------------------------------
-def filtrar_contratos(
+def montar_opcoes(valores_contagens, limite_label=None):
+    """Opções de dropdown no formato "VALOR (n)"."""
+    opcoes = []
+    for valor, qtd in valores_contagens:
+        nome = valor
+        if limite_label and len(valor) > limite_label:
+            nome = valor[:limite_label] + "..."
+        opcoes.append({"label": f"{nome} ({qtd})", "value": valor})
+    return opcoes
+
+
+def opcoes_filtros(
     contrato_texto,
     objeto_texto,
     setor,
@@ -162,58 +111,46 @@ def filtrar_contratos(
     empresa,
     status_vig,
 ):
-    dff = df_contratos_base.copy()
+    """Setor, Grupo e Empresa disponíveis no resultado filtrado (uma passada)."""
+    filtros = normalizar_filtros(
+        contrato_texto,
+        objeto_texto,
+        setor,
+        grupo,
+        empresa,
+        status_vig,
+    )
+    base, linhas = consultar_linhas(filtros)
+    facetas = contar_facetas(
+        base, linhas, ["Setor", "Grupo", "Empresa Contratada"]
+    )
 
-    # Contrato (texto) - busca parcial conforme digitação
-    if contrato_texto and str(contrato_texto).strip():
-        termo = str(contrato_texto).strip().lower()
-        dff = dff[
-            dff["Contrato"].astype(str).str.lower().str.contains(termo, na=False)
-        ]
+    return (
+        montar_opcoes(facetas["Setor"]),
+        montar_opcoes(facetas["Grupo"]),
+        montar_opcoes(facetas["Empresa Contratada"], limite_label=80),
+    )
 
-    # Objeto (texto) - busca parcial conforme digitação
-    if objeto_texto and str(objeto_texto).strip():
-        termo = str(objeto_texto).strip().lower()
-        dff = dff[
-            dff["Objeto"].astype(str).str.lower().str.contains(termo, na=False)
-        ]
 
-    # Setor - aceita lista de valores
-    if setor:
-        if isinstance(setor, str):
-            setor = [setor]
-        dff = dff[dff["Setor"].isin(setor)]
-
-    # Grupo - aceita lista de valores (mesmo que agora só exista 1)
-    if grupo:
-        if isinstance(grupo, str):
-            grupo = [grupo]
-        dff = dff[dff["Grupo"].isin(grupo)]
-
-    # Empresa - aceita lista de valores
-    if empresa:
-        if isinstance(empresa, str):
-            empresa = [empresa]
-        dff = dff[dff["Empresa Contratada"].isin(empresa)]
-
-    # Status - aceita lista de valores
-    if status_vig:
-        if isinstance(status_vig, str):
-            status_vig = [status_vig]
-        dff = dff[dff["Status da Vigência"].isin(status_vig)]
-
-    # remove linhas sem texto em Status da Vigência
-    dff = dff[dff["Status da Vigência"].astype(str).str.strip() != ""]
-
-    # Ordena por Término da Execução (mais recente em cima)
-    dff["_termino_exec_dt"] = pd.to_datetime(
-        dff["Término da Execução"], dayfirst=True, errors="coerce"
-    )
-    dff = dff.sort_values("_termino_exec_dt", ascending=False).drop(
-        columns=["_termino_exec_dt"]
-    )
+# Linhas por página da tabela (paginação feita no servidor)
+TAMANHO_PAGINA_CONTRATOS = 50
 
-    return dff
+COLUNAS_TABELA_CONTRATOS = [
+    {
+        "name": "Contrato",
+        "id": "Contrato_Link",
+        "type": "text",
+        "presentation": "markdown",
+    },
+    {"name": "Setor", "id": "Setor"},
+    {"name": "Grupo", "id": "Grupo"},
+    {"name": "Objeto", "id": "Objeto"},
+    {"name": "Empresa Contratada", "id": "Empresa Contratada"},
+    {"name": "Início da Vigência", "id": "Início da Vigência"},
+    {"name": "Término da Execução", "id": "Término da Execução"},
+    {"name": "Término da Vigência", "id": "Término da Vigência"},
+    {"name": "Status da Vigência", "id": "Status da Vigência"},
+]
 
 
 dropdown_style = {
@@ -247,284 +184,334 @@ botao_style = {
     "marginRight": "6px",
 }
 
+# Links de exportação com a mesma aparência dos botões
+link_style = {**botao_style, "textDecoration": "none", "display": "inline-block"}
+
 
 # --------------------------------------------------
 # Layout
 # --------------------------------------------------
-layout = html.Div(
-    children=[
-        html.Div(
-            id="barra_filtros_contratos",
-            className="filtros-sticky",
-            children=[
-                # Linha 1: Contrato, Objeto, Setor
-                html.Div(
-                    style={
-                        "display": "flex",
-                        "flexWrap": "wrap",
-                        "gap": "10px",
-                        "alignItems": "flex-start",
-                    },
-                    children=[
-                        html.Div(
-                            style={"minWidth": "220px", "flex": "1 1 260px"},
-                            children=[
-                                html.Label("Contrato"),
-                                dcc.Input(
-                                    id="filtro_contrato",
-                                    type="text",
-                                    placeholder="Digite parte do número do contrato...",
-                                    value="",
-                                    style=input_style,
-                                ),
-                            ],
-                        ),
-                        html.Div(
-                            style={"minWidth": "220px", "flex": "1 1 260px"},
-                            children=[
-                                html.Label("Objeto"),
-                                dcc.Input(
-                                    id="filtro_objeto",
-                                    type="text",
-                                    placeholder="Digite parte do objeto do contrato...",
-                                    value="",
-                                    style=input_style,
-                                ),
-                            ],
-                        ),
-                        html.Div(
-                            style={"minWidth": "220px", "flex": "1 1 260px"},
-                            children=[
-                                html.Label("Setor"),
-                                dcc.Dropdown(
-                                    id="filtro_setor",
-                                    options=[
-                                        {"label": str(setor), "value": str(setor)}
-                                        for setor in sorted(
-                                            df_contratos_base["Setor"]
-                                            .dropna()
-                                            .unique()
-                                        )
-                                        if str(setor).strip() != ""
-                                    ],
-                                    value=[],
-                                    placeholder="Selecione um ou mais setores...",
-                                    clearable=True,
-                                    multi=True,
-                                    searchable=True,
-                                    style=dropdown_style,
-                                ),
-                            ],
-                        ),
-                    ],
-                ),
-                # Linha 2: Empresa, Grupo, Status, botões
-                html.Div(
-                    style={
-                        "display": "flex",
-                        "flexWrap": "wrap",
-                        "gap": "10px",
-                        "alignItems": "flex-end",
-                        "marginTop": "4px",
-                    },
-                    children=[
-                        # Empresa
-                        html.Div(
-                            style={"minWidth": "220px", "flex": "1 1 260px"},
-                            children=[
-                                html.Label("Empresa Contratada"),
-                                dcc.Dropdown(
-                                    id="filtro_empresa",
-                                    options=[
-                                        {
-                                            "label": str(empresa)[:80] + "..."
-                                            if len(str(empresa)) > 80
-                                            else str(empresa),
-                                            "value": str(empresa),
-                                        }
-                                        for empresa in sorted(
-                                            df_contratos_base["Empresa Contratada"]
-                                            .dropna()
-                                            .unique()
-                                        )
-                                        if str(empresa).strip() != ""
-                                    ],
-                                    value=[],
-                                    placeholder="Selecione uma ou mais empresas...",
-                                    clearable=True,
-                                    multi=True,
-                                    searchable=True,
-                                    style=dropdown_style,
-                                ),
-                            ],
-                        ),
-                        # Grupo
-                        html.Div(
-                            style={"minWidth": "200px", "flex": "0 0 220px"},
-                            children=[
-                                html.Label("Grupo"),
-                                dcc.Dropdown(
-                                    id="filtro_grupo",
-                                    options=[
-                                        {"label": str(grupo), "value": str(grupo)}
-                                        for grupo in sorted(
-                                            df_contratos_base["Grupo"]
-                                            .dropna()
-                                            .unique()
-                                        )
-                                        if str(grupo).strip() != ""
-                                    ],
-                                    value=[],
-                                    placeholder="Selecione um ou mais grupos...",
-                                    clearable=True,
-                                    multi=True,
-                                    searchable=True,
-                                    style=dropdown_style,
-                                ),
-                            ],
-                        ),
-                        # Status da Vigência
-                        html.Div(
-                            style={"minWidth": "200px", "flex": "0 0 220px"},
-                            children=[
-                                html.Label("Status da Vigência"),
-                                dcc.Dropdown(
-                                    id="filtro_status_vig",
-                                    options=[
-                                        {"label": "Vigente", "value": "Vigente"},
-                                        {
-                                            "label": "Próximo do Vencimento",
-                                            "value": "Próximo do Vencimento",
-                                        },
-                                        {"label": "Vencido", "value": "Vencido"},
-                                    ],
-                                    value=[],
-                                    placeholder="Selecione um ou mais status...",
-                                    clearable=True,
-                                    multi=True,
-                                    searchable=True,
-                                    style=dropdown_style,
-                                ),
-                            ],
-                        ),
-                        # Botões
-                        html.Div(
-                            style={
-                                "display": "flex",
-                                "gap": "10px",
-                                "flexShrink": 0,
-                            },
-                            children=[
-                                html.Button(
-                                    "Limpar filtros",
-                                    id="btn_limpar_filtros_contratos",
-                                    n_clicks=0,
-                                    style=botao_style,
-                                ),
-                                html.Button(
-                                    "Baixar Relatório PDF",
-                                    id="btn_download_relatorio_contratos",
-                                    n_clicks=0,
-                                    style=botao_style,
-                                ),
-                                dcc.Download(id="download_relatorio_contratos"),
-                            ],
-                        ),
-                    ],
-                ),
-            ],
-        ),
-        dash_table.DataTable(
-            id="tabela_contratos",
-            columns=[
-                {
-                    "name": "Contrato",
-                    "id": "Contrato_Link",
-                    "type": "text",
-                    "presentation": "markdown",
+def layout(**kwargs):
+    """Monta o layout com as opções da versão vigente dos dados."""
+    op_setor, op_grupo, op_empresa = opcoes_filtros("", "", [], [], [], [])
+
+    return html.Div(
+        children=[
+            html.Div(
+                id="barra_filtros_contratos",
+                className="filtros-sticky",
+                children=[
+                    # Linha 1: Contrato, Objeto, Setor
+                    html.Div(
+                        style={
+                            "display": "flex",
+                            "flexWrap": "wrap",
+                            "gap": "10px",
+                            "alignItems": "flex-start",
+                        },
+                        children=[
+                            html.Div(
+                                style={"minWidth": "220px", "flex": "1 1 260px"},
+                                children=[
+                                    html.Label("Contrato"),
+                                    dcc.Input(
+                                        id="filtro_contrato",
+                                        type="text",
+                                        placeholder="Digite parte do número do contrato...",
+                                        value="",
+                                        style=input_style,
+                                    ),
+                                ],
+                            ),
+                            html.Div(
+                                style={"minWidth": "220px", "flex": "1 1 260px"},
+                                children=[
+                                    html.Label("Objeto"),
+                                    dcc.Input(
+                                        id="filtro_objeto",
+                                        type="text",
+                                        placeholder="Digite parte do objeto do contrato...",
+                                        value="",
+                                        style=input_style,
+                                    ),
+                                ],
+                            ),
+                            html.Div(
+                                style={"minWidth": "220px", "flex": "1 1 260px"},
+                                children=[
+                                    html.Label("Setor"),
+                                    dcc.Dropdown(
+                                        id="filtro_setor",
+                                        options=op_setor,
+                                        value=[],
+                                        placeholder="Selecione um ou mais setores...",
+                                        clearable=True,
+                                        multi=True,
+                                        searchable=True,
+                                        style=dropdown_style,
+                                    ),
+                                ],
+                            ),
+                        ],
+                    ),
+                    # Linha 2: Empresa, Grupo, Status, botões
+                    html.Div(
+                        style={
+                            "display": "flex",
+                            "flexWrap": "wrap",
+                            "gap": "10px",
+                            "alignItems": "flex-end",
+                            "marginTop": "4px",
+                        },
+                        children=[
+                            # Empresa
+                            html.Div(
+                                style={"minWidth": "220px", "flex": "1 1 260px"},
+                                children=[
+                                    html.Label("Empresa Contratada"),
+                                    dcc.Dropdown(
+                                        id="filtro_empresa",
+                                        options=op_empresa,
+                                        value=[],
+                                        placeholder="Selecione uma ou mais empresas...",
+                                        clearable=True,
+                                        multi=True,
+                                        searchable=True,
+                                        style=dropdown_style,
+                                    ),
+                                ],
+                            ),
+                            # Grupo
+                            html.Div(
+                                style={"minWidth": "200px", "flex": "0 0 220px"},
+                                children=[
+                                    html.Label("Grupo"),
+                                    dcc.Dropdown(
+                                        id="filtro_grupo",
+                                        options=op_grupo,
+                                        value=[],
+                                        placeholder="Selecione um ou mais grupos...",
+                                        clearable=True,
+                                        multi=True,
+                                        searchable=True,
+                                        style=dropdown_style,
+                                    ),
+                                ],
+                            ),
+                            # Status da Vigência
+                            html.Div(
+                                style={"minWidth": "200px", "flex": "0 0 220px"},
+                                children=[
+                                    html.Label("Status da Vigência"),
+                                    dcc.Dropdown(
+                                        id="filtro_status_vig",
+                                        options=[
+                                            {"label": "Vigente", "value": "Vigente"},
+                                            {
+                                                "label": "Próximo do Vencimento",
+                                                "value": "Próximo do Vencimento",
+                                            },
+                                            {"label": "Vencido", "value": "Vencido"},
+                                        ],
+                                        value=[],
+                                        placeholder="Selecione um ou mais status...",
+                                        clearable=True,
+                                        multi=True,
+                                        searchable=True,
+                                        style=dropdown_style,
+                                    ),
+                                ],
+                            ),
+                            # Botões
+                            html.Div(
+                                style={
+                                    "display": "flex",
+                                    "gap": "10px",
+                                    "flexShrink": 0,
+                                },
+                                children=[
+                                    html.Button(
+                                        "Limpar filtros",
+                                        id="btn_limpar_filtros_contratos",
+                                        n_clicks=0,
+                                        style=botao_style,
+                                    ),
+                                    html.Button(
+                                        "Baixar Relatório PDF",
+                                        id="btn_download_relatorio_contratos",
+                                        n_clicks=0,
+                                        style=botao_style,
+                                    ),
+                                    html.Button(
+                                        "Cancelar",
+                                        id="btn_cancelar_relatorio_contratos",
+                                        n_clicks=0,
+                                        style={**botao_style, "display": "none"},
+                                    ),
+                                    html.Progress(
+                                        id="progresso_relatorio_contratos",
+                                        value="0",
+                                        max="100",
+                                        style={"display": "none"},
+                                    ),
+                                    dcc.Download(id="download_relatorio_contratos"),
+                                    html.A(
+                                        "Baixar CSV",
+                                        id="link_exportar_csv_contratos",
+                                        href="/exportar/contratos.csv",
+                                        style=link_style,
+                                    ),
+                                    html.A(
+                                        "Baixar XLSX",
+                                        id="link_exportar_xlsx_contratos",
+                                        href="/exportar/contratos.xlsx",
+                                        style=link_style,
+                                    ),
+                                ],
+                            ),
+                        ],
+                    ),
+                ],
+            ),
+            html.Div(
+                id="total_contratos",
+                style={"fontSize": "12px", "margin": "4px 0"},
+            ),
+            html.Div(
+                id="aviso_relatorio_contratos",
+                style={"fontSize": "12px", "margin": "4px 0", "color": "#b00020"},
+            ),
+            dash_table.DataTable(
+                id="tabela_contratos",
+                columns=COLUNAS_TABELA_CONTRATOS,
+                data=[],
+                # Paginação no servidor: só a página visível é enviada
+                page_action="custom",
+                page_current=0,
+                page_size=TAMANHO_PAGINA_CONTRATOS,
+                page_count=1,
+                markdown_options={"html": True},
+                row_selectable=False,
+                cell_selectable=False,
+                style_table={
+                    "overflowX": "auto",
+                    "overflowY": "auto",
+                    "height": "calc(100vh - 200px)",
+                    "minHeight": "300px",
+                    "position": "relative",
                 },
-                {"name": "Setor", "id": "Setor"},
-                {"name": "Grupo", "id": "Grupo"},
-                {"name": "Objeto", "id": "Objeto"},
-                {"name": "Empresa Contratada", "id": "Empresa Contratada"},
-                {"name": "Início da Vigência", "id": "Início da Vigência"},
-                {"name": "Término da Execução", "id": "Término da Execução"},
-                {"name": "Término da Vigência", "id": "Término da Vigência"},
-                {"name": "Status da Vigência", "id": "Status da Vigência"},
-            ],
-            data=[],
-            markdown_options={"html": True},
-            row_selectable=False,
-            cell_selectable=False,
-            style_table={
-                "overflowX": "auto",
-                "overflowY": "auto",
-                "height": "calc(100vh - 200px)",
-                "minHeight": "300px",
-                "position": "relative",
-            },
-            style_cell={
-                "textAlign": "center",
-                "padding": "6px",
-                "fontSize": "12px",
-                "minWidth": "80px",
-                "maxWidth": "260px",
-                "whiteSpace": "normal",
-            },
-            style_header={
-                "fontWeight": "bold",
-                "backgroundColor": "#0b2b57",
-                "color": "white",
-                "textAlign": "center",
-                "position": "sticky",
-                "top": 0,
-                "zIndex": 5,
-            },
-            style_cell_conditional=[
-                {"if": {"column_id": "Contrato_Link"}, "textAlign": "center"},
-            ],
-            style_data_conditional=[
-                # Zebra: linhas pares/ímpares
-                {"if": {"row_index": "odd"}, "backgroundColor": "#f0f0f0"},
-                {"if": {"row_index": "even"}, "backgroundColor": "white"},
-                # Status = Vencido
-                {
-                    "if": {"filter_query": '{Status da Vigência} = "Vencido"'},
-                    "backgroundColor": "#ffcccc",
-                    "color": "black",
+                style_cell={
+                    "textAlign": "center",
+                    "padding": "6px",
+                    "fontSize": "12px",
+                    "minWidth": "80px",
+                    "maxWidth": "260px",
+                    "whiteSpace": "normal",
                 },
-                # Status = Próximo do Vencimento
-                {
-                    "if": {
-                        "filter_query": '{Status da Vigência} = "Próximo do Vencimento"'
-                    },
-                    "backgroundColor": "#ffffcc",
-                    "color": "black",
+                style_header={
+                    "fontWeight": "bold",
+                    "backgroundColor": "#0b2b57",
+                    "color": "white",
+                    "textAlign": "center",
+                    "position": "sticky",
+                    "top": 0,
+                    "zIndex": 5,
                 },
-            ],
-            css=[
-                dict(selector="p", rule="margin: 0; text-align: center;"),
-            ],
-        ),
-        dcc.Store(id="store_dados_contratos"),
-    ]
+                style_cell_conditional=[
+                    {"if": {"column_id": "Contrato_Link"}, "textAlign": "center"},
+                ],
+                style_data_conditional=[
+                    # Zebra: linhas pares/ímpares
+                    {"if": {"row_index": "odd"}, "backgroundColor": "#f0f0f0"},
+                    {"if": {"row_index": "even"}, "backgroundColor": "white"},
+                    # Status = Vencido
+                    {
+                        "if": {"filter_query": '{Status da Vigência} = "Vencido"'},
+                        "backgroundColor": "#ffcccc",
+                        "color": "black",
+                    },
+                    # Status = Próximo do Vencimento
+                    {
+                        "if": {
+                            "filter_query": '{Status da Vigência} = "Próximo do Vencimento"'
+                        },
+                        "backgroundColor": "#ffffcc",
+                        "color": "black",
+                    },
+                ],
+                css=[
+                    dict(selector="p", rule="margin: 0; text-align: center;"),
+                ],
+            ),
+            dcc.Store(id="store_dados_contratos"),
+            dcc.Store(id="store_versao_contratos"),
+            dcc.Store(id="store_pedido_relatorio_contratos"),
+            # Só usado com FILTRO_NO_NAVEGADOR. Fica na memória da página: a
+            # base (vários MB) estouraria a cota de ~5 MB do localStorage e
+            # do sessionStorage sem aviso
+            dcc.Store(id="store_base_contratos", storage_type="memory"),
+        ]
+    )
+
+
+# --------------------------------------------------
+# Callback: nova versão dos dados (interval-atualizacao do app.py)
+# --------------------------------------------------
+@callback(
+    Output("store_versao_contratos", "data"),
+    Input("interval-atualizacao", "n_intervals"),
+    State("store_versao_contratos", "data"),
 )
+def verificar_versao_contratos(n_intervals, versao_atual):
+    # Só dispara a atualização da tabela quando a versão publicada mudou
+    versao = obter_base().versao
+    if versao == versao_atual:
+        raise PreventUpdate
+    return versao
+
+
+# --------------------------------------------------
+# Callback: base para o navegador (só com FILTRO_NO_NAVEGADOR)
+# --------------------------------------------------
+def carregar_base_navegador(versao, base_atual):
+    # A cópia guardada no navegador ainda vale: nada a enviar
+    if not versao or (base_atual and base_atual.get("versao") == versao):
+        raise PreventUpdate
+
+    colunas = [c["id"] for c in COLUNAS_TABELA_CONTRATOS]
+    return dados_para_navegador(obter_base(), colunas)
+
+
+if FILTRO_NO_NAVEGADOR:
+    callback(
+        Output("store_base_contratos", "data"),
+        Input("store_versao_contratos", "data"),
+        State("store_base_contratos", "data"),
+    )(carregar_base_navegador)
 
 
 # --------------------------------------------------
 # Callback: filtros (tabela + store) - ATUALIZAÇÃO EM TEMPO REAL
 # --------------------------------------------------
-@callback(
-    Output("tabela_contratos", "data"),
-    Output("store_dados_contratos", "data"),
+ENTRADAS_FILTROS = [
     Input("filtro_contrato", "value"),
     Input("filtro_objeto", "value"),
     Input("filtro_setor", "value"),
     Input("filtro_grupo", "value"),
     Input("filtro_empresa", "value"),
     Input("filtro_status_vig", "value"),
-    prevent_initial_call=False,
-)
+]
+
+SAIDAS_TABELA = [
+    Output("tabela_contratos", "data"),
+    Output("tabela_contratos", "page_count"),
+    Output("tabela_contratos", "page_current"),
+    Output("total_contratos", "children"),
+    Output("store_dados_contratos", "data"),
+]
+
+
+@perfilar
 def atualizar_tabela_contratos(
     contrato_texto,
     objeto_texto,
@@ -532,11 +519,14 @@ def atualizar_tabela_contratos(
     grupo,
     empresa,
     status_vig,
+    versao,
+    page_current,
+    page_size,
 ):
     if not verificar_pagina_contratos():
         raise PreventUpdate
 
-    dff = filtrar_contratos(
+    filtros = normalizar_filtros(
         contrato_texto,
         objeto_texto,
         setor,
@@ -544,25 +534,19 @@ def atualizar_tabela_contratos(
         empresa,
         status_vig,
     )
+    base, linhas = consultar_linhas(filtros)
+
+    # Mudança de filtro volta para a primeira página
+    if dash.ctx.triggered_id != "tabela_contratos" or not page_current:
+        page_current = 0
+    page_size = page_size or TAMANHO_PAGINA_CONTRATOS
+
+    total = len(linhas)
+    page_count = max(1, math.ceil(total / page_size))
+    page_current = min(page_current, page_count - 1)
 
-    dff = dff.copy()
-
-    # Criar coluna com hyperlink HTML para a coluna Contrato
-    if "Link Comprasnet" in dff.columns:
-        dff["Contrato_Link"] = dff.apply(
-            lambda row: (
-                f'<a href="{row["Link Comprasnet"]}" target="_blank" '
-                f'style="color: #0b2b57; text-decoration: none; font-weight: bold;">'
-                f'{row["Contrato"]}</a>'
-            )
-            if pd.notna(row["Link Comprasnet"])
-            and str(row["Link Comprasnet"]).strip()
-            and str(row["Link Comprasnet"]).startswith(("http://", "https://"))
-            else row["Contrato"],
-            axis=1,
-        )
-    else:
-        dff["Contrato_Link"] = dff["Contrato"]
+    inicio = page_current * page_size
+    dff = base.df.iloc[linhas[inicio:inicio + page_size]]
 
     cols = [
         "Contrato_Link",
@@ -577,24 +561,48 @@ def atualizar_tabela_contratos(
     ]
     cols = [c for c in cols if c in dff.columns]
 
-    return dff[cols].to_dict("records"), dff.to_dict("records")
+    return (
+        formatar_para_exibicao(dff[cols]).to_dict("records"),
+        page_count,
+        page_current,
+        f"Total de contratos: {total}",
+        # Só a consulta vai para o navegador; exportações a resolvem no servidor
+        criar_consulta(filtros, base.versao),
+    )
+
+
+if FILTRO_NO_NAVEGADOR:
+    clientside_callback(
+        ClientsideFunction(namespace="contratos", function_name="atualizarTabela"),
+        *SAIDAS_TABELA,
+        *ENTRADAS_FILTROS,
+        Input("store_base_contratos", "data"),
+        Input("tabela_contratos", "page_current"),
+        State("tabela_contratos", "page_size"),
+        State("tabela_contratos", "columns"),
+    )
+else:
+    callback(
+        *SAIDAS_TABELA,
+        *ENTRADAS_FILTROS,
+        Input("store_versao_contratos", "data"),
+        Input("tabela_contratos", "page_current"),
+        State("tabela_contratos", "page_size"),
+        prevent_initial_call=False,
+    )(atualizar_tabela_contratos)
 
 
 # --------------------------------------------------
 # Callback: opções dos filtros (cascata) - ATUALIZAÇÃO EM TEMPO REAL
 # --------------------------------------------------
-@callback(
+SAIDAS_OPCOES = [
     Output("filtro_setor", "options"),
     Output("filtro_grupo", "options"),
     Output("filtro_empresa", "options"),
-    Input("filtro_contrato", "value"),
-    Input("filtro_objeto", "value"),
-    Input("filtro_setor", "value"),
-    Input("filtro_grupo", "value"),
-    Input("filtro_empresa", "value"),
-    Input("filtro_status_vig", "value"),
-    prevent_initial_call=False,
-)
+]
+
+
+@perfilar
 def atualizar_opcoes_filtros(
     contrato_texto,
     objeto_texto,
@@ -602,11 +610,12 @@ def atualizar_opcoes_filtros(
     grupo,
     empresa,
     status_vig,
+    versao,
 ):
     if not verificar_pagina_contratos():
         raise PreventUpdate
 
-    dff = filtrar_contratos(
+    return opcoes_filtros(
         contrato_texto,
         objeto_texto,
         setor,
@@ -615,31 +624,27 @@ def atualizar_opcoes_filtros(
         status_vig,
     )
 
-    op_setor = [
-        {"label": str(s), "value": str(s)}
-        for s in sorted(dff["Setor"].dropna().unique())
-        if str(s).strip()
-    ]
-
-    op_grupo = [
-        {"label": str(g), "value": str(g)}
-        for g in sorted(dff["Grupo"].dropna().unique())
-        if str(g).strip()
-    ]
-
-    op_empresa = []
-    for emp in sorted(dff["Empresa Contratada"].dropna().unique()):
-        emp_str = str(emp)
-        label = emp_str[:80] + "..." if len(emp_str) > 80 else emp_str
-        op_empresa.append({"label": label, "value": emp_str})
 
-    return op_setor, op_grupo, op_empresa
+if FILTRO_NO_NAVEGADOR:
+    clientside_callback(
+        ClientsideFunction(namespace="contratos", function_name="atualizarOpcoes"),
+        *SAIDAS_OPCOES,
+        *ENTRADAS_FILTROS,
+        Input("store_base_contratos", "data"),
+    )
+else:
+    callback(
+        *SAIDAS_OPCOES,
+        *ENTRADAS_FILTROS,
+        Input("store_versao_contratos", "data"),
+        prevent_initial_call=False,
+    )(atualizar_opcoes_filtros)
 
 
 # --------------------------------------------------
 # Callback: limpar filtros
 # --------------------------------------------------
-@callback(
+DEPENDENCIAS_LIMPAR = [
     Output("filtro_contrato", "value", allow_duplicate=True),
     Output("filtro_objeto", "value", allow_duplicate=True),
     Output("filtro_setor", "value", allow_duplicate=True),
@@ -647,8 +652,9 @@ def atualizar_opcoes_filtros(
     Output("filtro_empresa", "value", allow_duplicate=True),
     Output("filtro_status_vig", "value", allow_duplicate=True),
     Input("btn_limpar_filtros_contratos", "n_clicks"),
-    prevent_initial_call=True,
-)
+]
+
+
 def limpar_filtros_contratos(n):
     if not verificar_pagina_contratos():
         raise PreventUpdate
@@ -656,236 +662,143 @@ def limpar_filtros_contratos(n):
     return "", "", [], [], [], []
 
 
+if FILTRO_NO_NAVEGADOR:
+    clientside_callback(
+        ClientsideFunction(namespace="contratos", function_name="limparFiltros"),
+        *DEPENDENCIAS_LIMPAR,
+        prevent_initial_call=True,
+    )
+else:
+    callback(*DEPENDENCIAS_LIMPAR, prevent_initial_call=True)(
+        limpar_filtros_contratos
+    )
+
+
 # --------------------------------------------------
-# Estilos para PDF
+# Callback: links de exportação CSV/XLSX com os filtros atuais
 # --------------------------------------------------
-wrap_style_data = ParagraphStyle(
-    name="wrap_contratos_data",
-    fontSize=7,
-    leading=8,
-    alignment=TA_CENTER,
-    textColor=colors.black,
-)
+def url_exportacao(consulta, formato):
+    """URL da rota de exportação (rotas/exportacao.py) para a consulta."""
+    url = f"/exportar/contratos.{formato}"
+    if not consulta:
+        return url
+    contrato, objeto, setor, grupo, empresa, status_vig = consulta["filtros"]
+    parametros = urlencode(
+        {
+            "contrato": contrato,
+            "objeto": objeto,
+            "setor": setor,
+            "grupo": grupo,
+            "empresa": empresa,
+            "status": status_vig,
+        },
+        doseq=True,
+    )
+    return f"{url}?{parametros}"
 
-wrap_style_header = ParagraphStyle(
-    name="wrap_contratos_header",
-    fontSize=7,
-    leading=8,
-    alignment=TA_CENTER,
-    textColor=colors.white,
-)
 
+DEPENDENCIAS_LINKS = [
+    Output("link_exportar_csv_contratos", "href"),
+    Output("link_exportar_xlsx_contratos", "href"),
+    Input("store_dados_contratos", "data"),
+]
 
-def wrap_data(text):
-    return Paragraph(str(text), wrap_style_data)
 
+def atualizar_links_exportacao(consulta):
+    return url_exportacao(consulta, "csv"), url_exportacao(consulta, "xlsx")
 
-def wrap_header(text):
-    return Paragraph(str(text), wrap_style_header)
+
+if FILTRO_NO_NAVEGADOR:
+    clientside_callback(
+        ClientsideFunction(
+            namespace="contratos", function_name="atualizarLinksExportacao"
+        ),
+        *DEPENDENCIAS_LINKS,
+    )
+else:
+    callback(*DEPENDENCIAS_LINKS)(atualizar_links_exportacao)
 
 
 # --------------------------------------------------
-# Callback: gerar PDF de contratos
+# Callback: gerar PDF de contratos (em segundo plano, com progresso)
 # --------------------------------------------------
-@callback(
-    Output("download_relatorio_contratos", "data"),
+# Cada clique gera um pedido único (assets/contratos_filtros.js): o cacheKey
+# da tarefa em segundo plano vem só dos argumentos, e dois usuários com o
+# mesmo clique e a mesma consulta dividiriam a tarefa (um receberia o PDF, o
+# outro nada). O reaproveitamento fica no cache de relatórios em disco.
+clientside_callback(
+    ClientsideFunction(namespace="contratos", function_name="novoPedidoRelatorio"),
+    Output("store_pedido_relatorio_contratos", "data"),
     Input("btn_download_relatorio_contratos", "n_clicks"),
-    State("store_dados_contratos", "data"),
     prevent_initial_call=True,
 )
-def gerar_pdf_contratos(n, dados_contratos):
-    if not verificar_pagina_contratos():
-        raise PreventUpdate
-
-    if not n or not dados_contratos:
-        return None
-
-    df = pd.DataFrame(dados_contratos)
-
-    buffer = BytesIO()
-    pagesize = landscape(A4)
-
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=pagesize,
-        rightMargin=0.3 * inch,
-        leftMargin=0.3 * inch,
-        topMargin=0.2 * inch,
-        bottomMargin=0.4 * inch,
-    )
-
-    styles = getSampleStyleSheet()
-    story = []
-
-    tz_brasilia = timezone("America/Sao_Paulo")
-    data_hora = datetime.now(tz_brasilia).strftime("%d/%m/%Y %H:%M:%S")
-
-    story.append(
-        Table(
-            [
-                [
-                    Paragraph(
-                        data_hora,
-                        ParagraphStyle(
-                            "data_topo_contratos",
-                            fontSize=9,
-                            alignment=TA_RIGHT,
-                            textColor="#333333",
-                        ),
-                    )
-                ]
-            ],
-            colWidths=[pagesize[0] - 0.6 * inch],
-        )
-    )
-    story.append(Spacer(1, 0.15 * inch))
 
-    logo_esq = (
-        Image("assets/brasaobrasil.png", 1.2 * inch, 1.2 * inch)
-        if os.path.exists("assets/brasaobrasil.png")
-        else ""
-    )
-
-    logo_dir = (
-        Image("assets/simbolo_RGB.png", 1.2 * inch, 1.2 * inch)
-        if os.path.exists("assets/simbolo_RGB.png")
-        else ""
-    )
+AVISO_CONSULTA_DESATUALIZADA = (
+    "Os dados foram atualizados desde a consulta exibida. "
+    "Atualize a página e gere o relatório novamente."
+)
 
-    texto_instituicao = (
-        "<b><font color='#0b2b57' size=13>Ministério da Educação</font></b><br/>"
-        "<b><font color='#0b2b57' size=13>Universidade Federal de Itajubá</font></b><br/>"
-        "<font color='#0b2b57' size=11>Diretoria de Compras e Contratos</font>"
-    )
 
-    instituicao = Paragraph(
-        texto_instituicao,
-        ParagraphStyle(
-            "instituicao",
-            alignment=TA_CENTER,
-            leading=16,
+@callback(
+    Output("download_relatorio_contratos", "data"),
+    Output("aviso_relatorio_contratos", "children"),
+    Input("store_pedido_relatorio_contratos", "data"),
+    State("store_dados_contratos", "data"),
+    background=True,
+    running=[
+        (Output("btn_download_relatorio_contratos", "disabled"), True, False),
+        (
+            Output("btn_cancelar_relatorio_contratos", "style"),
+            botao_style,
+            {**botao_style, "display": "none"},
         ),
-    )
-
-    cabecalho = Table(
-        [[logo_esq, instituicao, logo_dir]],
-        colWidths=[1.4 * inch, 4.2 * inch, 1.4 * inch],
-    )
-
-    cabecalho.setStyle(
-        TableStyle(
-            [
-                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ("TOPPADDING", (0, 0), (-1, -1), 6),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-            ]
-        )
-    )
-
-    story.append(cabecalho)
-    story.append(Spacer(1, 0.25 * inch))
-
-    titulo = Paragraph(
-        "RELATÓRIO DE CONTRATOS ATIVOS - UASG: 153030 - Campus Itajubá<br/>",
-        ParagraphStyle(
-            "titulo_contratos",
-            alignment=TA_CENTER,
-            fontSize=10,
-            leading=14,
-            textColor=colors.black,
+        (
+            Output("progresso_relatorio_contratos", "style"),
+            {"display": "inline-block", "alignSelf": "center"},
+            {"display": "none"},
         ),
-    )
-
-    story.append(titulo)
-    story.append(Spacer(1, 0.2 * inch))
-
-    story.append(Paragraph(f"Total de registros: {len(df)}", styles["Normal"]))
-    story.append(Spacer(1, 0.15 * inch))
-
-    cols = [
-        "Contrato",
-        "Setor",
-        "Grupo",
-        "Objeto",
-        "Empresa Contratada",
-        "Início da Vigência",
-        "Término da Execução",
-        "Término da Vigência",
-        "Status da Vigência",
-    ]
+    ],
+    progress=[
+        Output("progresso_relatorio_contratos", "value"),
+        Output("progresso_relatorio_contratos", "max"),
+    ],
+    cancel=[Input("btn_cancelar_relatorio_contratos", "n_clicks")],
+    prevent_initial_call=True,
+)
+@medir_callback
+@perfilar
+def gerar_pdf_contratos(set_progress, pedido, consulta):
+    if not verificar_pagina_contratos():
+        raise PreventUpdate
 
-    for c in cols:
-        if c not in df.columns:
-            df[c] = ""
+    if not pedido or not consulta:
+        return None, ""
 
-    df_pdf = df.copy()
+    # Mesmo resultado da tabela (mesma versão dos dados), resolvido no
+    # servidor pelo cache de filtros
+    try:
+        base, linhas = resolver_consulta(consulta)
+    except ConsultaDesatualizada:
+        return None, AVISO_CONSULTA_DESATUALIZADA
 
-    header = [wrap_header(c) for c in cols]
-    table_data = [header]
+    if not len(linhas):
+        return None, ""
 
-    status_values = df["Status da Vigência"].fillna("").tolist()
+    # Relatório já renderizado para esta versão + filtros: só troca o horário
+    modelo = obter_relatorio(base.versao, consulta["filtros"])
+    if modelo is None:
 
-    for _, row in df_pdf[cols].iterrows():
-        table_data.append([wrap_data(row[c]) for c in cols])
+        def progresso(feitas, total):
+            set_progress((str(feitas), str(total)))
 
-    col_widths = [
-        0.8 * inch,  # Contrato
-        0.9 * inch,  # Setor
-        0.9 * inch,  # Grupo
-        2.2 * inch,  # Objeto
-        1.8 * inch,  # Empresa Contratada
-        1.0 * inch,  # Início da Vigência
-        1.1 * inch,  # Término da Execução
-        1.1 * inch,  # Término da Vigência
-        1.1 * inch,  # Status da Vigência
-    ]
+        df = formatar_para_exibicao(base.df.iloc[linhas])
+        modelo = montar_modelo_pdf_contratos(df, progresso=progresso)
+        guardar_relatorio(base.versao, consulta["filtros"], modelo)
 
-    tbl = Table(table_data, colWidths=col_widths, repeatRows=1)
-
-    table_styles = [
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0b2b57")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-        ("FONTSIZE", (0, 0), (-1, -1), 7),
-        ("TOPPADDING", (0, 0), (-1, -1), 2),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
-        ("LEFTPADDING", (0, 0), (-1, -1), 2),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 2),
-        (
-            "ROWBACKGROUNDS",
-            (0, 1),
-            (-1, -1),
-            [colors.white, colors.HexColor("#f0f0f0")],
+    return (
+        dcc.send_bytes(
+            carimbar_data_hora(modelo),
+            f"relatorio_contratos_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf",
         ),
-    ]
-
-    for i, status in enumerate(status_values, 1):
-        status_str = str(status).strip().lower()
-        if "vencido" in status_str:
-            table_styles.append(
-                ("BACKGROUND", (0, i), (-1, i), colors.HexColor("#ffcccc"))
-            )
-            table_styles.append(
-                ("TEXTCOLOR", (0, i), (-1, i), colors.HexColor("#cc0000"))
-            )
-        elif "próximo do vencimento" in status_str or "proximo do vencimento" in status_str:
-            table_styles.append(
-                ("BACKGROUND", (0, i), (-1, i), colors.HexColor("#ffffcc"))
-            )
-            table_styles.append(
-                ("TEXTCOLOR", (0, i), (-1, i), colors.HexColor("#cc8800"))
-            )
-
-    tbl.setStyle(TableStyle(table_styles))
-    story.append(tbl)
-
-    doc.build(story)
-    buffer.seek(0)
-
-    return dcc.send_bytes(
-        buffer.getvalue(),
-        f"relatorio_contratos_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf",
+        "",
     )
@@ -0,0 +1,140 @@
+"""Gera em lote os relatórios PDF de contratos, um por Setor ou por Status.
+
+Uso (a partir da raiz do repositório):
+
+    python relatorios_lote.py --por setor --saida relatorios/2026-10
+    python relatorios_lote.py --por status --snapshot cache/contratos.pkl --workers 4
+
+Os dados são carregados uma única vez (planilha ou snapshot) e a renderização,
+limitada por CPU, é distribuída entre processos.
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from servicos.consulta_contratos import consultar_linhas, normalizar_filtros
+from servicos.dados_contratos import (
+    carregar_dados_contratos,
+    carregar_snapshot,
+    construir_base,
+    formatar_para_exibicao,
+)
+from servicos.indices_contratos import normalizar_texto
+from servicos.relatorio_contratos import montar_pdf_contratos
+
+
+# Coluna usada para separar os relatórios
+AGRUPAMENTOS = {
+    "setor": "Setor",
+    "status": "Status da Vigência",
+}
+
+
+def _nome_arquivo(valor, usados=()):
+    """Nome do PDF a partir do valor da coluna.
+
+    Se o nome já estiver em `usados` (valores com o mesmo slug, como "PRO-AD"
+    e "PRO AD"), ganha um sufixo com o resumo do valor original.
+    """
+    slug = re.sub(r"[^a-z0-9]+", "_", normalizar_texto(valor)).strip("_")
+    slug = slug or "sem_valor"
+    nome = f"relatorio_contratos_{slug}.pdf"
+    if nome in usados:
+        resumo = hashlib.sha1(valor.encode("utf-8")).hexdigest()[:8]
+        nome = f"relatorio_contratos_{slug}_{resumo}.pdf"
+    return nome
+
+
+def _filtros_para(agrupamento, valor):
+    if agrupamento == "setor":
+        return normalizar_filtros("", "", [valor], [], [], [])
+    return normalizar_filtros("", "", [], [], [], [valor])
+
+
+def _renderizar(caminho, df):
+    """Executado nos processos do pool: gera e grava um PDF."""
+    inicio = time.perf_counter()
+    conteudo = montar_pdf_contratos(df)
+    with open(caminho, "wb") as f:
+        f.write(conteudo)
+    return caminho, len(df), time.perf_counter() - inicio
+
+
+def preparar_trabalhos(base, agrupamento, pasta_saida):
+    """Um par (caminho do PDF, linhas formatadas) por valor da coluna."""
+    coluna = AGRUPAMENTOS[agrupamento]
+    indice = base.bitmaps[coluna]
+
+    trabalhos = []
+    usados = set()
+    for valor in indice.categorias:
+        if not valor.strip():
+            continue
+        _, linhas = consultar_linhas(_filtros_para(agrupamento, valor), base=base)
+        if not len(linhas):
+            continue
+        df = formatar_para_exibicao(base.df.iloc[linhas])
+        nome = _nome_arquivo(valor, usados)
+        usados.add(nome)
+        trabalhos.append((os.path.join(pasta_saida, nome), df))
+    return trabalhos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--por", choices=sorted(AGRUPAMENTOS), default="setor")
+    parser.add_argument("--saida", default="relatorios")
+    parser.add_argument(
+        "--snapshot",
+        help="snapshot local (cache/contratos.pkl) em vez de baixar a planilha",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="processos de renderização (padrão: número de CPUs)",
+    )
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    if args.snapshot:
+        df = carregar_snapshot(args.snapshot)
+        if df is None:
+            parser.error(f"snapshot inválido ou inexistente: {args.snapshot}")
+    else:
+        df = carregar_dados_contratos()
+    base = construir_base(df)
+    print(f"Dados carregados: {len(base.df)} linhas, versão {base.versao}")
+
+    os.makedirs(args.saida, exist_ok=True)
+    trabalhos = preparar_trabalhos(base, args.por, args.saida)
+
+    falhas = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futuros = {
+            pool.submit(_renderizar, caminho, df): caminho
+            for caminho, df in trabalhos
+        }
+        for futuro in as_completed(futuros):
+            try:
+                caminho, n_linhas, segundos = futuro.result()
+            except Exception as erro:
+                falhas += 1
+                print(f"ERRO {futuros[futuro]}: {erro}", file=sys.stderr)
+                continue
+            print(f"{caminho}: {n_linhas} contratos em {segundos:.1f}s")
+
+    print(
+        f"{len(trabalhos) - falhas} relatório(s) em "
+        f"{time.perf_counter() - inicio:.1f}s ({args.workers} processos)"
+    )
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Rotas Flask servidas diretamente pelo `app.server` (fora dos callbacks Dash)."""
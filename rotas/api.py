@@ -0,0 +1,82 @@
+import math
+
+from flask import Blueprint, Response, jsonify, request
+
+from rotas.comum import filtros_da_requisicao
+from servicos.consulta_contratos import consultar_linhas
+from servicos.dados_contratos import COLUNAS_DATA, obter_base
+from servicos.exportacao import COLUNAS_EXPORTACAO
+
+
+bp_api = Blueprint("api", __name__, url_prefix="/api")
+
+POR_PAGINA_PADRAO = 100
+POR_PAGINA_MAXIMO = 1000
+
+
+def _inteiro(nome, padrao, minimo, maximo):
+    valor = request.args.get(nome, padrao)
+    try:
+        valor = int(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{nome}' deve ser um número inteiro")
+    if not minimo <= valor <= maximo:
+        raise ValueError(f"'{nome}' deve estar entre {minimo} e {maximo}")
+    return valor
+
+
+def registros_api(df):
+    """Linhas como dicionários: datas em ISO (aaaa-mm-dd) e vazios como null."""
+    df = df[[c for c in COLUNAS_EXPORTACAO if c in df.columns]].copy()
+    for col in df.columns:
+        if col in COLUNAS_DATA:
+            df[col] = df[col].dt.strftime("%Y-%m-%d")
+        df[col] = df[col].astype(object).where(df[col].notna() & (df[col] != ""), None)
+    return df.to_dict("records")
+
+
+# --------------------------------------------------
+# GET /api/contratos
+# --------------------------------------------------
+@bp_api.route("/contratos")
+def listar_contratos():
+    """Contratos filtrados e paginados, com ETag da versão dos dados.
+
+    Aceita os filtros da página (contrato, objeto, setor, grupo, empresa,
+    status; os quatro últimos podem se repetir) e `pagina`/`por_pagina`.
+    """
+    base = obter_base()
+
+    # A resposta de uma mesma URL só muda quando a versão dos dados muda:
+    # a revalidação é respondida sem consultar nada
+    if request.if_none_match.contains_weak(base.versao):
+        resposta = Response(status=304)
+    else:
+        try:
+            pagina = _inteiro("pagina", 1, 1, 10**9)
+            por_pagina = _inteiro(
+                "por_pagina", POR_PAGINA_PADRAO, 1, POR_PAGINA_MAXIMO
+            )
+        except ValueError as erro:
+            return jsonify({"erro": str(erro)}), 400
+
+        _, linhas = consultar_linhas(filtros_da_requisicao(request.args), base=base)
+        inicio = (pagina - 1) * por_pagina
+        resposta = jsonify(
+            {
+                "versao": base.versao,
+                "carregada_em": base.carregada_em.isoformat(timespec="seconds"),
+                "total": len(linhas),
+                "pagina": pagina,
+                "por_pagina": por_pagina,
+                "paginas": max(1, math.ceil(len(linhas) / por_pagina)),
+                "contratos": registros_api(
+                    base.df.iloc[linhas[inicio:inicio + por_pagina]]
+                ),
+            }
+        )
+
+    resposta.set_etag(base.versao)
+    # Clientes podem guardar a resposta, mas devem revalidar a cada uso
+    resposta.headers["Cache-Control"] = "no-cache"
+    return resposta
@@ -0,0 +1,13 @@
+from servicos.consulta_contratos import normalizar_filtros
+
+
+def filtros_da_requisicao(args):
+    """Filtros canônicos a partir da query string (mesmos nomes da página)."""
+    return normalizar_filtros(
+        args.get("contrato", ""),
+        args.get("objeto", ""),
+        args.getlist("setor"),
+        args.getlist("grupo"),
+        args.getlist("empresa"),
+        args.getlist("status"),
+    )
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from flask import Blueprint, Response, abort, request, stream_with_context
+
+from rotas.comum import filtros_da_requisicao
+from servicos.consulta_contratos import consultar_linhas
+from servicos.exportacao import FORMATOS_EXPORTACAO
+
+
+bp_exportacao = Blueprint("exportacao", __name__)
+
+
+# --------------------------------------------------
+# /exportar/contratos.csv e /exportar/contratos.xlsx
+# --------------------------------------------------
+@bp_exportacao.route("/exportar/contratos.<formato>")
+def exportar_contratos(formato):
+    if formato not in FORMATOS_EXPORTACAO:
+        abort(404)
+    gerar, tipo = FORMATOS_EXPORTACAO[formato]
+
+    # A versão é fixada no início: uma troca de dados durante o download
+    # não mistura linhas de versões diferentes
+    base, linhas = consultar_linhas(filtros_da_requisicao(request.args))
+
+    nome = f"contratos_{datetime.now().strftime('%Y%m%d%H%M%S')}.{formato}"
+    return Response(
+        stream_with_context(gerar(base.df, linhas)),
+        mimetype=tipo,
+        headers={
+            "Content-Disposition": f'attachment; filename="{nome}"',
+            "X-Versao-Dados": base.versao,
+        },
+    )
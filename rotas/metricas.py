@@ -0,0 +1,77 @@
+import time
+
+from flask import Blueprint, Response
+
+from servicos.consulta_contratos import estatisticas_cache_filtros
+from servicos.dados_contratos import (
+    base_publicada,
+    registrar_ao_publicar,
+    verificada_em,
+)
+from servicos.metricas import METRICAS_ATIVAS, MULTIPROCESSO, registrar_publicacao
+
+if METRICAS_ATIVAS:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        REGISTRY,
+        CollectorRegistry,
+        generate_latest,
+        multiprocess,
+    )
+    from prometheus_client.core import GaugeMetricFamily
+
+
+bp_metricas = Blueprint("metricas", __name__)
+
+registrar_ao_publicar(registrar_publicacao)
+
+
+class _ColetorProcesso:
+    """Indicadores deste processo calculados na coleta (idade dos dados, cache)."""
+
+    def collect(self):
+        yield GaugeMetricFamily(
+            "contratos_cache_filtros_entradas",
+            "Combinações de filtros guardadas no cache LRU deste processo",
+            value=estatisticas_cache_filtros()["entradas"],
+        )
+
+        base = base_publicada()
+        if base is None:
+            return
+        # Conta a partir da última leitura da planilha, mesmo sem versão nova
+        momento = verificada_em() or base.carregada_em.timestamp()
+        yield GaugeMetricFamily(
+            "contratos_dados_idade_segundos",
+            "Segundos desde a última leitura bem-sucedida da planilha",
+            value=time.time() - momento,
+        )
+
+
+if METRICAS_ATIVAS and not MULTIPROCESSO:
+    REGISTRY.register(_ColetorProcesso())
+
+
+def _registro():
+    if not MULTIPROCESSO:
+        return REGISTRY
+    # Soma os arquivos de todos os processos (workers e tarefas em segundo plano)
+    registro = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registro)
+    registro.register(_ColetorProcesso())
+    return registro
+
+
+# --------------------------------------------------
+# GET /metrics - formato texto do Prometheus
+# --------------------------------------------------
+@bp_metricas.route("/metrics")
+def metricas():
+    """Latência e tamanho por callback, caches, planilha e versão dos dados."""
+    if not METRICAS_ATIVAS:
+        return Response(
+            "Métricas desativadas (CONTRATOS_METRICAS=0 ou sem prometheus_client)\n",
+            status=404,
+            mimetype="text/plain",
+        )
+    return Response(generate_latest(_registro()), content_type=CONTENT_TYPE_LATEST)
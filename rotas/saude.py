@@ -0,0 +1,33 @@
+import os
+from datetime import datetime
+
+from flask import Blueprint, jsonify
+
+from servicos.dados_contratos import base_publicada
+
+
+bp_saude = Blueprint("saude", __name__)
+
+
+# --------------------------------------------------
+# GET /pronto - prontidão para receber tráfego
+# --------------------------------------------------
+@bp_saude.route("/pronto")
+def pronto():
+    """200 quando há uma versão dos dados publicada neste processo, senão 503."""
+    base = base_publicada()
+    if base is None:
+        return jsonify({"status": "carregando", "pid": os.getpid()}), 503
+
+    return jsonify(
+        {
+            "status": "pronto",
+            "pid": os.getpid(),
+            "versao": base.versao,
+            "linhas": len(base.df),
+            "carregada_em": base.carregada_em.isoformat(timespec="seconds"),
+            "idade_segundos": int(
+                (datetime.now() - base.carregada_em).total_seconds()
+            ),
+        }
+    )
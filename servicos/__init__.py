@@ -0,0 +1 @@
+"""Serviços compartilhados pelos painéis (dados, índices e relatórios)."""
@@ -0,0 +1,385 @@
+import fcntl
+import gc
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import servicos.dados_contratos as dados
+from servicos.indices_contratos import IndiceBitmap, IndiceTrigramas
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------
+# Versão dos dados compartilhada entre processos (Arrow IPC mapeado)
+# --------------------------------------------------
+# Um único processo do host (quem obtém o lock) baixa a planilha, monta a
+# versão e grava DataFrame + índices em arquivos Arrow; os demais só leem o
+# carimbo e mapeiam os arquivos (páginas compartilhadas pelo SO). Ficam no
+# mapa, sem cópia, as colunas de texto do DataFrame, as listas dos trigramas
+# e os bitsets; as colunas de data e category, os textos normalizados dos
+# índices e os nomes das categorias são materializados em cada processo.
+BASE_COMPARTILHADA = (
+    os.environ.get("CONTRATOS_BASE_COMPARTILHADA", "0") == "1" and pa is not None
+)
+
+DIR_COMPARTILHADO = os.path.join(dados.DIR_CACHE, "compartilhado")
+ARQUIVO_CARIMBO = os.path.join(DIR_COMPARTILHADO, "versao")
+ARQUIVO_LOCK = os.path.join(DIR_COMPARTILHADO, "atualizador.lock")
+
+# Frequência (segundos) com que cada processo confere o carimbo
+INTERVALO_VERIFICACAO = float(
+    os.environ.get("CONTRATOS_INTERVALO_VERIFICACAO_COMPARTILHADA", 5)
+)
+
+# Índices de texto gravados junto com os dados (BaseContratos.indice_*)
+INDICES_TEXTO = ("contrato", "objeto")
+
+
+def _pasta_versao(versao):
+    return os.path.join(DIR_COMPARTILHADO, f"v-{versao}")
+
+
+# --------------------------------------------------
+# Gravação
+# --------------------------------------------------
+def _lista(valores, tipo):
+    """Coluna de uma linha só com todo o array (lido depois sem cópia)."""
+    return pa.array([valores], type=pa.list_(tipo))
+
+
+def _tabela_indices(base):
+    colunas = {}
+    for nome in INDICES_TEXTO:
+        indice = getattr(base, f"indice_{nome}")
+        chaves = list(indice.postagens)
+        tamanhos = [len(indice.postagens[c]) for c in chaves]
+        linhas = (
+            np.concatenate([indice.postagens[c] for c in chaves])
+            if chaves
+            else np.zeros(0, dtype=np.int32)
+        )
+        colunas[f"{nome}.textos"] = _lista(indice.textos, pa.string())
+        colunas[f"{nome}.chaves"] = _lista(chaves, pa.string())
+        colunas[f"{nome}.inicios"] = _lista(
+            np.r_[0, np.cumsum(tamanhos)].astype(np.int64), pa.int64()
+        )
+        colunas[f"{nome}.linhas"] = _lista(linhas, pa.int32())
+
+    for col, indice in base.bitmaps.items():
+        bitsets = (
+            np.concatenate([indice.bitsets[v] for v in indice.categorias])
+            if indice.categorias
+            else np.zeros(0, dtype=np.uint8)
+        )
+        colunas[f"{col}.codigos"] = _lista(indice.codigos, pa.int32())
+        colunas[f"{col}.categorias"] = _lista(indice.categorias, pa.string())
+        colunas[f"{col}.bitsets"] = _lista(bitsets, pa.uint8())
+
+    colunas["bits_validos"] = _lista(base.bits_validos, pa.uint8())
+    return pa.table(colunas)
+
+
+def _gravar_arrow(caminho, tabela):
+    # Sem compressão: os buffers são mapeados diretamente
+    with pa.OSFile(caminho, "wb") as arquivo:
+        with pa.ipc.new_file(arquivo, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+
+
+def gravar_versao(base):
+    """Grava dados e índices da versão e troca o carimbo (operações atômicas)."""
+    os.makedirs(DIR_COMPARTILHADO, exist_ok=True)
+    pasta = _pasta_versao(base.versao)
+
+    if not os.path.isdir(pasta):
+        temporaria = f"{pasta}.{os.getpid()}.tmp"
+        shutil.rmtree(temporaria, ignore_errors=True)
+        os.makedirs(temporaria)
+
+        dados_arrow = pa.Table.from_pandas(base.df, preserve_index=False)
+        dados_arrow = dados_arrow.replace_schema_metadata(
+            {
+                **(dados_arrow.schema.metadata or {}),
+                b"contratos": json.dumps(
+                    {
+                        "versao": base.versao,
+                        "carregada_em": base.carregada_em.isoformat(),
+                    }
+                ).encode("utf-8"),
+            }
+        )
+        _gravar_arrow(os.path.join(temporaria, "dados.arrow"), dados_arrow)
+        _gravar_arrow(os.path.join(temporaria, "indices.arrow"), _tabela_indices(base))
+        try:
+            os.replace(temporaria, pasta)
+        except OSError:
+            # Outro processo gravou a mesma versão ao mesmo tempo
+            shutil.rmtree(temporaria, ignore_errors=True)
+            if not os.path.isdir(pasta):
+                raise
+
+    anterior = versao_carimbada()
+    temporario = f"{ARQUIVO_CARIMBO}.{os.getpid()}.tmp"
+    with open(temporario, "w") as f:
+        f.write(base.versao)
+    os.replace(temporario, ARQUIVO_CARIMBO)
+
+    # A versão anterior fica até a próxima publicação: um processo pode ter
+    # lido o carimbo antigo e ainda não ter mapeado os arquivos
+    _remover_versoes_antigas(manter={base.versao, anterior})
+
+
+def _remover_versoes_antigas(manter):
+    """Remove pastas de versões antigas.
+
+    Processos que já mapeiam uma delas continuam lendo normalmente: o
+    arquivo só deixa de existir de fato quando o último mapeamento é fechado.
+    """
+    for nome in os.listdir(DIR_COMPARTILHADO):
+        if nome.startswith("v-") and not nome.endswith(".tmp"):
+            if nome[2:] not in manter:
+                shutil.rmtree(os.path.join(DIR_COMPARTILHADO, nome), ignore_errors=True)
+
+
+# --------------------------------------------------
+# Leitura (mapeamento sem cópia)
+# --------------------------------------------------
+def _ler_arrow(caminho):
+    return pa.ipc.open_file(pa.memory_map(caminho, "r")).read_all()
+
+
+def _valores(tabela, nome):
+    return tabela.column(nome).chunk(0).values
+
+
+def _numpy(tabela, nome):
+    return _valores(tabela, nome).to_numpy(zero_copy_only=True)
+
+
+def _textos(tabela, nome):
+    return _valores(tabela, nome).to_pylist()
+
+
+def _dataframe(tabela):
+    """DataFrame com os mesmos tipos de `construir_base`.
+
+    Só as colunas de texto continuam apontando para o mapa; datas e
+    category são convertidas (cópia) para os tipos do pandas.
+    """
+    texto = pd.StringDtype("pyarrow")
+    return tabela.to_pandas(
+        types_mapper={pa.string(): texto, pa.large_string(): texto}.get
+    )
+
+
+def carregar_versao(versao):
+    """BaseContratos de uma versão gravada, mapeada do arquivo (ver _dataframe)."""
+    pasta = _pasta_versao(versao)
+    tabela = _ler_arrow(os.path.join(pasta, "dados.arrow"))
+    indices = _ler_arrow(os.path.join(pasta, "indices.arrow"))
+    meta = json.loads(tabela.schema.metadata[b"contratos"])
+
+    df = _dataframe(tabela)
+
+    textuais = {}
+    for nome in INDICES_TEXTO:
+        chaves = _textos(indices, f"{nome}.chaves")
+        inicios = _numpy(indices, f"{nome}.inicios")
+        linhas = _numpy(indices, f"{nome}.linhas")
+        textuais[nome] = IndiceTrigramas.de_arrays(
+            _textos(indices, f"{nome}.textos"),
+            {
+                chave: linhas[inicio:fim]
+                for chave, inicio, fim in zip(chaves, inicios[:-1], inicios[1:])
+            },
+        )
+
+    bitmaps = {}
+    tamanho_bits = (len(df) + 7) // 8
+    for col in dados.COLUNAS_CATEGORICAS:
+        categorias = _textos(indices, f"{col}.categorias")
+        bitsets = _numpy(indices, f"{col}.bitsets")
+        bitmaps[col] = IndiceBitmap.de_arrays(
+            _numpy(indices, f"{col}.codigos"),
+            categorias,
+            {
+                valor: bitsets[i * tamanho_bits:(i + 1) * tamanho_bits]
+                for i, valor in enumerate(categorias)
+            },
+        )
+
+    return dados.BaseContratos(
+        versao=meta["versao"],
+        df=df,
+        carregada_em=datetime.fromisoformat(meta["carregada_em"]),
+        indice_contrato=textuais["contrato"],
+        indice_objeto=textuais["objeto"],
+        bitmaps=bitmaps,
+        bits_validos=_numpy(indices, "bits_validos"),
+    )
+
+
+def versao_carimbada():
+    """Versão indicada pelo carimbo, ou None se ainda não houver."""
+    try:
+        with open(ARQUIVO_CARIMBO) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+_versao_mapeada = None
+
+
+def seguir_carimbo():
+    """Passa a usar a versão do carimbo, mapeada, se ainda não for a vigente.
+
+    Se a versão vigente for a mesma, mas montada em memória (mestre ou
+    atualizador), ela é trocada pela cópia mapeada sem nova notificação.
+    """
+    global _versao_mapeada
+
+    versao = versao_carimbada()
+    if versao is None:
+        return dados.base_publicada()
+
+    # O carimbo é regravado (ou tocado) a cada leitura bem-sucedida da planilha
+    try:
+        dados.registrar_verificacao(os.path.getmtime(ARQUIVO_CARIMBO))
+    except FileNotFoundError:
+        pass
+    if versao == _versao_mapeada:
+        return dados.base_publicada()
+
+    try:
+        nova = carregar_versao(versao)
+    except FileNotFoundError:
+        # Versão trocada (e removida) entre a leitura do carimbo e o mapeamento
+        versao = versao_carimbada()
+        nova = carregar_versao(versao)
+
+    base = dados.publicar_base(nova, substituir=True)
+    _versao_mapeada = versao
+    return base
+
+
+# --------------------------------------------------
+# Atualização: um processo grava, os demais acompanham o carimbo
+# --------------------------------------------------
+# Descritor do lock, só no processo que é o atualizador do host
+_fd_lock = None
+
+
+def _obter_lock():
+    """Tenta ser o atualizador do host; devolve o descritor ou None."""
+    os.makedirs(DIR_COMPARTILHADO, exist_ok=True)
+    fd = os.open(ARQUIVO_LOCK, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _fechar_lock_no_filho():
+    # Processos criados por fork a partir do atualizador (tarefas em segundo
+    # plano do Dash) não podem segurar o lock depois que ele terminar
+    global _fd_lock
+
+    if _fd_lock is not None:
+        os.close(_fd_lock)
+        _fd_lock = None
+
+
+os.register_at_fork(after_in_child=_fechar_lock_no_filho)
+
+
+def atualizar_e_compartilhar():
+    """Baixa a planilha, grava a versão e passa a usar a cópia mapeada."""
+    base = dados.construir_base(dados.carregar_dados_contratos())
+    if base.versao != versao_carimbada():
+        gravar_versao(base)
+    else:
+        # Mesmo conteúdo: o horário do carimbo marca a leitura para os demais
+        os.utime(ARQUIVO_CARIMBO)
+    return seguir_carimbo()
+
+
+def _laco_sincronizacao(intervalo):
+    global _fd_lock
+
+    ultima_atualizacao = time.monotonic()
+
+    while True:
+        solicitada = dados.aguardar_solicitacao(INTERVALO_VERIFICACAO)
+        try:
+            # O lock é mantido enquanto o processo viver; se ele morrer,
+            # outro processo assume na verificação seguinte
+            if _fd_lock is None:
+                _fd_lock = _obter_lock()
+
+            vencida = time.monotonic() - ultima_atualizacao >= intervalo
+            if _fd_lock is not None and (solicitada or vencida):
+                ultima_atualizacao = time.monotonic()
+                atualizar_e_compartilhar()
+            else:
+                seguir_carimbo()
+        except Exception:
+            atual = dados.base_publicada()
+            logger.exception(
+                "Falha ao sincronizar os dados compartilhados; mantendo a versão %s",
+                atual.versao if atual is not None else "-",
+            )
+
+
+_thread_sincronizacao = None
+
+
+def iniciar_no_worker():
+    """Depois do fork: sincronização compartilhada ou o atualizador comum."""
+    global _thread_sincronizacao
+
+    if not BASE_COMPARTILHADA:
+        return dados.iniciar_atualizador_no_worker()
+
+    _thread_sincronizacao = threading.Thread(
+        target=_laco_sincronizacao,
+        args=(dados.INTERVALO_ATUALIZACAO,),
+        name="sincronizacao-contratos",
+        daemon=True,
+    )
+    _thread_sincronizacao.start()
+    return _thread_sincronizacao
+
+
+def preparar_para_fork():
+    """No mestre: carga única, gravação da versão e troca pela cópia mapeada."""
+    dados.preparar_para_fork(congelar=False)
+    if BASE_COMPARTILHADA:
+        fd = _obter_lock()
+        if fd is not None:
+            try:
+                base = dados.obter_base()
+                if base.versao != versao_carimbada():
+                    gravar_versao(base)
+            finally:
+                # O lock não pode ser herdado pelos workers
+                os.close(fd)
+        seguir_carimbo()
+        gc.collect()
+    gc.freeze()
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import logging
+import os
+
+from servicos.dados_contratos import DIR_CACHE, base_publicada, registrar_ao_publicar
+from servicos.metricas import MedidorCache
+
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------
+# Cache em disco dos relatórios PDF já renderizados
+# --------------------------------------------------
+DIR_RELATORIOS = os.path.join(DIR_CACHE, "relatorios")
+
+# Versão publicada mais recente, gravada por quem publica. As tarefas do PDF
+# rodam em processos criados por fork, que não veem as publicações seguintes.
+ARQUIVO_VIGENTE = os.path.join(DIR_RELATORIOS, "vigente")
+
+# Tamanho máximo da pasta; os arquivos usados há mais tempo saem primeiro
+LIMITE_CACHE_RELATORIOS = (
+    int(os.environ.get("CONTRATOS_CACHE_RELATORIOS_MB", 200)) * 1024 * 1024
+)
+
+
+def _caminho(versao, filtros):
+    """Arquivo endereçado pelo conteúdo: versão dos dados + filtros canônicos."""
+    resumo = hashlib.sha256(
+        json.dumps([versao, filtros], ensure_ascii=False).encode("utf-8")
+    ).hexdigest()[:32]
+    return os.path.join(DIR_RELATORIOS, f"{versao}-{resumo}.pdf")
+
+
+_medidor = MedidorCache("relatorios")
+
+
+def obter_relatorio(versao, filtros):
+    """Modelo do PDF (sem horário) já renderizado, ou None."""
+    caminho = _caminho(versao, filtros)
+    try:
+        with open(caminho, "rb") as f:
+            conteudo = f.read()
+    except FileNotFoundError:
+        _medidor.registrar(False)
+        return None
+    _medidor.registrar(True)
+
+    # Marca o uso para a política LRU
+    try:
+        os.utime(caminho)
+    except OSError:
+        pass
+    return conteudo
+
+
+def _versao_vigente():
+    """Última versão publicada (por qualquer processo), ou None."""
+    try:
+        with open(ARQUIVO_VIGENTE, encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        base = base_publicada()
+        return base.versao if base is not None else None
+
+
+def _desatualizada(versao):
+    vigente = _versao_vigente()
+    return vigente is not None and vigente != versao
+
+
+def guardar_relatorio(versao, filtros, conteudo):
+    """Grava o modelo de forma atômica e aplica o limite de tamanho da pasta.
+
+    Não grava se outra versão já tiver sido publicada: o arquivo não seria
+    mais consultado.
+    """
+    if _desatualizada(versao):
+        return
+    os.makedirs(DIR_RELATORIOS, exist_ok=True)
+    caminho = _caminho(versao, filtros)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    try:
+        with open(temporario, "wb") as f:
+            f.write(conteudo)
+        os.replace(temporario, caminho)
+    finally:
+        # Depois do os.replace o temporário já não existe
+        _remover(temporario)
+
+    # Publicação entre a verificação e a troca: a limpeza dela pode já ter
+    # listado a pasta
+    if _desatualizada(versao):
+        _remover(caminho)
+        return
+
+    _aplicar_limite()
+
+
+def _arquivos():
+    try:
+        nomes = os.listdir(DIR_RELATORIOS)
+    except FileNotFoundError:
+        return []
+
+    arquivos = []
+    for nome in nomes:
+        if not nome.endswith(".pdf"):
+            continue
+        caminho = os.path.join(DIR_RELATORIOS, nome)
+        try:
+            info = os.stat(caminho)
+        except FileNotFoundError:
+            continue
+        arquivos.append((info.st_mtime, info.st_size, caminho, nome))
+    return arquivos
+
+
+def _remover(caminho):
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
+
+
+def _aplicar_limite():
+    arquivos = sorted(_arquivos())
+    total = sum(tamanho for _, tamanho, _, _ in arquivos)
+    for _, tamanho, caminho, _ in arquivos:
+        if total <= LIMITE_CACHE_RELATORIOS:
+            break
+        _remover(caminho)
+        total -= tamanho
+
+
+def _gravar_vigente(versao):
+    os.makedirs(DIR_RELATORIOS, exist_ok=True)
+    temporario = f"{ARQUIVO_VIGENTE}.{os.getpid()}.tmp"
+    try:
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(versao)
+        os.replace(temporario, ARQUIVO_VIGENTE)
+    finally:
+        _remover(temporario)
+
+
+def invalidar_outras_versoes(versao):
+    """Marca a versão vigente e remove os relatórios de outras versões."""
+    _gravar_vigente(versao)
+    removidos = 0
+    for _, _, caminho, nome in _arquivos():
+        if not nome.startswith(f"{versao}-"):
+            _remover(caminho)
+            removidos += 1
+    if removidos:
+        logger.info(
+            "Cache de relatórios: %d arquivo(s) de versões antigas removido(s)",
+            removidos,
+        )
+
+
+registrar_ao_publicar(lambda base: invalidar_outras_versoes(base.versao))
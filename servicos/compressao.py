@@ -0,0 +1,100 @@
+import gzip
+import os
+import time
+
+from flask import request
+
+from servicos.metricas import BYTES_ENVIADOS, BYTES_ORIGINAIS, DURACAO_COMPRESSAO
+
+# Brotli é opcional: sem ele, só gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# --------------------------------------------------
+# Configuração
+# --------------------------------------------------
+COMPRESSAO_ATIVA = os.environ.get("CONTRATOS_COMPRESSAO", "1") != "0"
+
+# Respostas menores que isso vão sem compressão (bytes)
+COMPRESSAO_MINIMO = int(os.environ.get("CONTRATOS_COMPRESSAO_MINIMO", 1024))
+
+NIVEL_GZIP = int(os.environ.get("CONTRATOS_COMPRESSAO_NIVEL_GZIP", 6))
+NIVEL_BROTLI = int(os.environ.get("CONTRATOS_COMPRESSAO_NIVEL_BROTLI", 4))
+
+TIPOS_COMPRIMIVEIS = {
+    "application/json",
+    "application/javascript",
+    "text/html",
+    "text/css",
+    "text/csv",
+    "text/javascript",
+    "text/plain",
+    "image/svg+xml",
+}
+
+CODIFICACOES = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def _comprimir(dados, codificacao):
+    if codificacao == "br":
+        return brotli.compress(dados, quality=NIVEL_BROTLI)
+    return gzip.compress(dados, compresslevel=NIVEL_GZIP, mtime=0)
+
+
+# --------------------------------------------------
+# Medição por rota (/metrics)
+# --------------------------------------------------
+def _registrar(rota, codificacao, original, enviado, segundos=None):
+    codificacao = codificacao or "nenhuma"
+    BYTES_ORIGINAIS.labels(rota, codificacao).inc(original)
+    BYTES_ENVIADOS.labels(rota, codificacao).inc(enviado)
+    if segundos is not None:
+        DURACAO_COMPRESSAO.labels(rota, codificacao).observe(segundos)
+
+
+# --------------------------------------------------
+# Hook do Flask
+# --------------------------------------------------
+def _comprimir_resposta(resposta):
+    if (
+        resposta.direct_passthrough
+        or resposta.is_streamed
+        or resposta.status_code < 200
+        or resposta.status_code in (204, 304)
+        or "Content-Encoding" in resposta.headers
+        or resposta.mimetype not in TIPOS_COMPRIMIVEIS
+    ):
+        return resposta
+
+    resposta.vary.add("Accept-Encoding")
+    # Rotas inexistentes ficam juntas (evita um rótulo por URL)
+    rota = request.url_rule.rule if request.url_rule else "desconhecida"
+    dados = resposta.get_data()
+
+    codificacao = request.accept_encodings.best_match(CODIFICACOES)
+    if not codificacao or len(dados) < COMPRESSAO_MINIMO:
+        _registrar(rota, None, len(dados), len(dados))
+        return resposta
+
+    inicio = time.perf_counter()
+    comprimido = _comprimir(dados, codificacao)
+    _registrar(
+        rota, codificacao, len(dados), len(comprimido), time.perf_counter() - inicio
+    )
+
+    resposta.set_data(comprimido)
+    resposta.headers["Content-Encoding"] = codificacao
+    # Outra representação: a ETag forte vira fraca (If-None-Match compara fraco)
+    etag, fraca = resposta.get_etag()
+    if etag and not fraca:
+        resposta.set_etag(etag, weak=True)
+    return resposta
+
+
+def instalar_compressao(server):
+    """Comprime (br/gzip) as respostas do Flask, inclusive as dos callbacks Dash."""
+    if COMPRESSAO_ATIVA:
+        server.after_request(_comprimir_resposta)
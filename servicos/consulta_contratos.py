@@ -0,0 +1,281 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from servicos.dados_contratos import (
+    COLUNAS_CATEGORICAS,
+    formatar_para_exibicao,
+    obter_base,
+    obter_versao,
+)
+from servicos.indices_contratos import desempacotar, normalizar_texto
+from servicos.metricas import LINHAS_FILTRADAS, MedidorCache
+
+
+# Quantidade máxima de combinações de filtros guardadas em memória
+TAMANHO_CACHE_FILTROS = int(os.environ.get("CONTRATOS_CACHE_FILTROS", 256))
+
+
+# --------------------------------------------------
+# Cache LRU de resultados de filtros
+# --------------------------------------------------
+class CacheLRU:
+    """Cache LRU limitado por quantidade de entradas, seguro entre threads.
+
+    Com `nome`, acertos e falhas também vão para as métricas (/metrics).
+    """
+
+    def __init__(self, tamanho_maximo, nome=None):
+        self.tamanho_maximo = tamanho_maximo
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self._medidor = MedidorCache(nome) if nome else None
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, chave):
+        with self._lock:
+            valor = self._itens.get(chave)
+            if valor is None:
+                self.falhas += 1
+            else:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+        if self._medidor is not None:
+            self._medidor.registrar(valor is not None)
+        return valor
+
+    def guardar(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "entradas": len(self._itens),
+                "tamanho_maximo": self.tamanho_maximo,
+            }
+
+
+_cache_filtros = CacheLRU(TAMANHO_CACHE_FILTROS, nome="filtros")
+
+
+def estatisticas_cache_filtros():
+    """Contadores de acertos/falhas do cache de filtros."""
+    return _cache_filtros.estatisticas()
+
+
+# --------------------------------------------------
+# Forma canônica dos filtros
+# --------------------------------------------------
+def _normalizar_termo(texto):
+    if not texto or not str(texto).strip():
+        return ""
+    return normalizar_texto(str(texto).strip())
+
+
+def _normalizar_selecao(valores):
+    if not valores:
+        return ()
+    if isinstance(valores, str):
+        valores = [valores]
+    return tuple(sorted({str(v) for v in valores}))
+
+
+def normalizar_filtros(
+    contrato_texto,
+    objeto_texto,
+    setor,
+    grupo,
+    empresa,
+    status_vig,
+):
+    """Tupla canônica dos filtros (texto sem caixa/espaços, seleções ordenadas)."""
+    return (
+        _normalizar_termo(contrato_texto),
+        _normalizar_termo(objeto_texto),
+        _normalizar_selecao(setor),
+        _normalizar_selecao(grupo),
+        _normalizar_selecao(empresa),
+        _normalizar_selecao(status_vig),
+    )
+
+
+# --------------------------------------------------
+# Resolução dos filtros em posições de linhas
+# --------------------------------------------------
+def _resolver_linhas(base, filtros):
+    contrato, objeto, setor, grupo, empresa, status_vig = filtros
+
+    # Contrato e Objeto (texto) - busca parcial conforme digitação,
+    # resolvida pelos índices de trigramas (sem acento e sem caixa)
+    linhas = None
+    for termo, indice in (
+        (contrato, base.indice_contrato),
+        (objeto, base.indice_objeto),
+    ):
+        if termo:
+            encontradas = indice.buscar(termo)
+            linhas = (
+                encontradas
+                if linhas is None
+                else np.intersect1d(linhas, encontradas, assume_unique=True)
+            )
+
+    # Setor, Grupo, Empresa e Status - aceitam lista de valores:
+    # OR dos bitsets dentro da coluna, AND entre as colunas
+    bits = base.bits_validos.copy()
+    for col, valores in (
+        ("Setor", setor),
+        ("Grupo", grupo),
+        ("Empresa Contratada", empresa),
+        ("Status da Vigência", status_vig),
+    ):
+        if valores:
+            np.bitwise_and(bits, base.bitmaps[col].selecionar(valores), out=bits)
+
+    mascara = desempacotar(bits, len(base.df))
+    if linhas is not None:
+        mascara_texto = np.zeros(len(mascara), dtype=bool)
+        mascara_texto[linhas] = True
+        mascara &= mascara_texto
+
+    # A base já está na ordem de exibição (Término da Execução decrescente)
+    return np.flatnonzero(mascara)
+
+
+def consultar_linhas(filtros, base=None):
+    """Posições das linhas que atendem aos filtros canônicos, via cache LRU.
+
+    O array retornado é somente leitura e compartilhado entre chamadas.
+    """
+    base = base or obter_base()
+    chave = (base.versao, filtros)
+
+    linhas = _cache_filtros.obter(chave)
+    if linhas is None:
+        linhas = _resolver_linhas(base, filtros)
+        linhas.flags.writeable = False
+        _cache_filtros.guardar(chave, linhas)
+    LINHAS_FILTRADAS.observe(len(linhas))
+    return base, linhas
+
+
+# --------------------------------------------------
+# Consulta compacta (guardada no navegador no lugar dos registros)
+# --------------------------------------------------
+def criar_consulta(filtros, versao):
+    """Identificador serializável de uma consulta: filtros canônicos + versão."""
+    return {
+        "versao": versao,
+        "filtros": [list(f) if isinstance(f, tuple) else f for f in filtros],
+    }
+
+
+class ConsultaDesatualizada(Exception):
+    """A versão dos dados da consulta já não está disponível no servidor."""
+
+
+def resolver_consulta(consulta):
+    """Reconstrói as linhas de uma consulta no servidor, via cache de filtros.
+
+    As linhas vêm da mesma versão dos dados da consulta (as da tela); se ela
+    já foi descartada, levanta ConsultaDesatualizada.
+    """
+    base = obter_versao(consulta["versao"])
+    if base is None:
+        raise ConsultaDesatualizada(consulta["versao"])
+    filtros = tuple(
+        tuple(f) if isinstance(f, list) else f for f in consulta["filtros"]
+    )
+    return consultar_linhas(filtros, base)
+
+
+def contar_facetas(base, linhas, colunas):
+    """Valores disponíveis e quantidade de linhas de cada um, por coluna.
+
+    Uma única passada sobre os códigos pré-ordenados das linhas filtradas;
+    valores sem linhas ou em branco ficam de fora.
+    """
+    facetas = {}
+    for col in colunas:
+        indice = base.bitmaps[col]
+        contagens = indice.contar(linhas)
+        facetas[col] = [
+            (valor, int(qtd))
+            for valor, qtd in zip(indice.categorias, contagens)
+            if qtd and valor.strip()
+        ]
+    return facetas
+
+
+# --------------------------------------------------
+# Base para filtragem no navegador (assets/contratos_filtros.js)
+# --------------------------------------------------
+_cache_navegador = CacheLRU(2, nome="navegador")
+
+
+def dados_para_navegador(base, colunas):
+    """Versão colunar da base para o navegador filtrar com a mesma semântica.
+
+    Leva os textos já normalizados dos índices de Contrato/Objeto, os códigos
+    e categorias (em ordem) dos bitmaps e, das demais `colunas`, os valores
+    formatados para exibição. Montada uma vez por versão dos dados.
+    """
+    chave = (base.versao, tuple(colunas))
+    dados = _cache_navegador.obter(chave)
+    if dados is not None:
+        return dados
+
+    outras = [c for c in colunas if c not in COLUNAS_CATEGORICAS]
+    exibicao = formatar_para_exibicao(base.df[outras])
+    dados = {
+        "versao": base.versao,
+        "total": len(base.df),
+        "textos": {
+            "contrato": base.indice_contrato.textos,
+            "objeto": base.indice_objeto.textos,
+        },
+        "categorias": {
+            col: {
+                "valores": indice.categorias,
+                "codigos": indice.codigos.tolist(),
+            }
+            for col, indice in base.bitmaps.items()
+        },
+        "exibicao": {col: exibicao[col].tolist() for col in outras},
+    }
+    _cache_navegador.guardar(chave, dados)
+    return dados
+
+
+def filtrar_contratos(
+    contrato_texto,
+    objeto_texto,
+    setor,
+    grupo,
+    empresa,
+    status_vig,
+):
+    """Filtros em cascata independentes; retorna as linhas já ordenadas."""
+    filtros = normalizar_filtros(
+        contrato_texto,
+        objeto_texto,
+        setor,
+        grupo,
+        empresa,
+        status_vig,
+    )
+    base, linhas = consultar_linhas(filtros)
+    return base.df.iloc[linhas]
@@ -0,0 +1,517 @@
+import gc
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from servicos.indices_contratos import IndiceBitmap, IndiceTrigramas, empacotar
+from servicos.metricas import (
+    DADOS_VERIFICADOS_EM,
+    DURACAO_PLANILHA,
+    FALHAS_PLANILHA,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------
+# URL da planilha de Contratos
+# --------------------------------------------------
+URL_CONTRATOS = os.environ.get(
+    "CONTRATOS_URL_PLANILHA",
+    "https://docs.google.com/spreadsheets/d/"
+    "17nBhvSoCeK3hNgCj2S57q3pF2Uxj6iBpZDvCX481KcU/"
+    "gviz/tq?tqx=out:csv&sheet=Grupo%20da%20Cont.",
+)
+
+# Grupo fixo a exibir
+GRUPO_FIXO = "FUNDAÇÃO DE APOIO"
+
+# Intervalo (segundos) entre as atualizações em segundo plano.
+# Mantido igual ao dcc.Interval "interval-atualizacao" do app.py.
+INTERVALO_ATUALIZACAO = int(
+    os.environ.get("CONTRATOS_INTERVALO_ATUALIZACAO", 60 * 60)
+)
+
+
+# Snapshot local dos dados já tratados (inicialização sem depender da rede)
+DIR_CACHE = os.environ.get(
+    "CONTRATOS_DIR_CACHE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache"),
+)
+ARQUIVO_SNAPSHOT = os.path.join(DIR_CACHE, "contratos.pkl")
+
+# Incrementar sempre que o formato do DataFrame tratado mudar
+VERSAO_ESQUEMA_SNAPSHOT = 2
+
+# Versões mantidas em memória (a vigente e as anteriores) para que consultas
+# feitas antes de uma atualização continuem resolvendo as mesmas linhas
+VERSOES_RETIDAS = max(1, int(os.environ.get("CONTRATOS_VERSOES_RETIDAS", 2)))
+
+# Com gunicorn preload_app (gunicorn.conf.py) a thread de atualização só é
+# iniciada nos workers, depois do fork: threads não sobrevivem ao fork
+ADIAR_ATUALIZADOR = os.environ.get("CONTRATOS_ADIAR_ATUALIZADOR", "0") == "1"
+
+
+# nomes exatos das colunas originais no CSV
+COL_CONTRATO = "Contrato"
+COL_SETOR = "Setor"
+COL_MENU_GRUPO = "MENU Grupo"
+COL_OBJETO_ORIG = (
+    "UNIVERSIDADE FEDERAL DE ITAJUBÁ Diretoria de Compras e Contratos "
+    "Campus Itajubá CONTRATOS ATIVOS - ALIMENTAÇÃO DO BI Objeto"
+)
+COL_EMPRESA = "Empresa Contratada"
+COL_INICIO_VIG = "Início da Vigência"
+COL_TERMINO_EXEC = "Término da Execução"
+COL_TERMINO_VIG = "Termino da Vigência"  # igual na planilha
+COL_LINK_COMPRASNET = "Comprasnet Contratos"
+
+
+COLUNAS_DATA = ["Início da Vigência", "Término da Execução", "Término da Vigência"]
+
+STATUS_VIGENCIA = ["Vigente", "Próximo do Vencimento", "Vencido", ""]
+
+# Texto livre em strings Arrow quando o pyarrow estiver instalado
+try:
+    import pyarrow  # noqa: F401
+
+    TIPO_TEXTO = "string[pyarrow]"
+except ImportError:
+    TIPO_TEXTO = "string"
+
+# Colunas dos filtros de seleção múltipla (indexadas por bitsets)
+COLUNAS_CATEGORICAS = ["Setor", "Grupo", "Empresa Contratada", "Status da Vigência"]
+
+
+# --------------------------------------------------
+# Carga e tratamento dos dados
+# --------------------------------------------------
+def carregar_dados_contratos():
+    inicio = time.perf_counter()
+    try:
+        df = pd.read_csv(URL_CONTRATOS, header=0)
+    except Exception:
+        FALHAS_PLANILHA.inc()
+        raise
+    DURACAO_PLANILHA.observe(time.perf_counter() - inicio)
+    registrar_verificacao()
+    df.columns = [c.strip() for c in df.columns]
+
+    if COL_LINK_COMPRASNET not in df.columns:
+        df[COL_LINK_COMPRASNET] = ""
+
+    df = df.rename(
+        columns={
+            COL_CONTRATO: "Contrato",
+            COL_SETOR: "Setor",
+            COL_MENU_GRUPO: "Grupo",
+            COL_OBJETO_ORIG: "Objeto",
+            COL_EMPRESA: "Empresa Contratada",
+            COL_INICIO_VIG: "Início da Vigência",
+            COL_TERMINO_EXEC: "Término da Execução",
+            COL_TERMINO_VIG: "Término da Vigência",
+            COL_LINK_COMPRASNET: "Link Comprasnet",
+        }
+    )
+
+    # ✅ FILTRO FIXO: somente FUNDAÇÃO DE APOIO
+    df = df[df["Grupo"].astype(str).str.strip().str.upper() == GRUPO_FIXO.upper()]
+
+    df = df.copy()
+
+    # Datas permanecem datetime64; dd/mm/aaaa só na exibição
+    for col in COLUNAS_DATA:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], dayfirst=True, errors="coerce")
+
+    hoje = pd.Timestamp(datetime.now().date())
+    dias = (df["Término da Execução"].dt.normalize() - hoje).dt.days
+    status = np.select(
+        [dias > 10, dias < 0, dias.notna()],
+        ["Vigente", "Vencido", "Próximo do Vencimento"],
+        default="",
+    )
+    df["Status da Vigência"] = pd.Categorical(status, categories=STATUS_VIGENCIA)
+
+    # Colunas de filtro como category; texto livre como string (Arrow)
+    for col in ["Setor", "Grupo", "Empresa Contratada"]:
+        df[col] = df[col].astype("category")
+    for col in ["Contrato", "Objeto", "Link Comprasnet"]:
+        df[col] = df[col].astype(TIPO_TEXTO)
+
+    try:
+        salvar_snapshot(df)
+    except OSError:
+        logger.warning("Não foi possível gravar o snapshot em %s", ARQUIVO_SNAPSHOT)
+
+    return df
+
+
+# --------------------------------------------------
+# Snapshot local (pickle com versão de esquema)
+# --------------------------------------------------
+def salvar_snapshot(df, caminho=None):
+    """Grava o DataFrame tratado de forma atômica (arquivo temporário + rename)."""
+    caminho = caminho or ARQUIVO_SNAPSHOT
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+    conteudo = {
+        "versao_esquema": VERSAO_ESQUEMA_SNAPSHOT,
+        "salvo_em": datetime.now(),
+        "df": df,
+    }
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    try:
+        with open(temporario, "wb") as f:
+            pickle.dump(conteudo, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, caminho)
+    finally:
+        # Depois do os.replace o temporário já não existe
+        _remover_arquivo(temporario)
+    _remover_temporarios_orfaos(caminho)
+
+
+def _remover_arquivo(caminho):
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
+
+
+def _remover_temporarios_orfaos(caminho):
+    """Apaga `<caminho>.<pid>.tmp` deixados por processos que já morreram."""
+    pasta, nome = os.path.split(caminho)
+    for arquivo in os.listdir(pasta):
+        if not (arquivo.startswith(f"{nome}.") and arquivo.endswith(".tmp")):
+            continue
+        pid = arquivo[len(nome) + 1 : -len(".tmp")]
+        if not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            _remover_arquivo(os.path.join(pasta, arquivo))
+        except PermissionError:
+            # Processo vivo de outro usuário
+            pass
+
+
+def carregar_snapshot(caminho=None):
+    """Lê o snapshot local; retorna None se ausente, ilegível ou de outro esquema."""
+    caminho = caminho or ARQUIVO_SNAPSHOT
+    try:
+        with open(caminho, "rb") as f:
+            conteudo = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logger.warning("Snapshot de contratos ilegível em %s; ignorando", caminho)
+        return None
+
+    if conteudo.get("versao_esquema") != VERSAO_ESQUEMA_SNAPSHOT:
+        logger.info("Snapshot de contratos com esquema antigo; ignorando")
+        return None
+    registrar_verificacao(conteudo["salvo_em"].timestamp())
+    return conteudo["df"]
+
+
+# --------------------------------------------------
+# Última leitura bem-sucedida da planilha
+# --------------------------------------------------
+# Uma atualização que encontra o mesmo conteúdo não publica versão nova
+# (a versão é um hash do conteúdo), mas confirma que os dados estão em dia
+_verificada_em = None
+
+
+def registrar_verificacao(momento=None):
+    """Anota uma leitura bem-sucedida (agora, ou no horário Unix `momento`)."""
+    global _verificada_em
+
+    momento = time.time() if momento is None else momento
+    if _verificada_em is None or momento > _verificada_em:
+        _verificada_em = momento
+        DADOS_VERIFICADOS_EM.set(momento)
+
+
+def verificada_em():
+    """Horário (Unix) da última leitura bem-sucedida da planilha, ou None."""
+    return _verificada_em
+
+
+# --------------------------------------------------
+# Versão publicada dos dados
+# --------------------------------------------------
+@dataclass(frozen=True)
+class BaseContratos:
+    """Versão imutável dos dados de contratos e das estruturas derivadas."""
+
+    versao: str
+    df: pd.DataFrame
+    carregada_em: datetime
+    indice_contrato: IndiceTrigramas
+    indice_objeto: IndiceTrigramas
+    bitmaps: dict
+    bits_validos: np.ndarray
+
+
+def calcular_versao(df):
+    """Identificador curto derivado do conteúdo do DataFrame."""
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha1(hashes.tobytes()).hexdigest()[:12]
+
+
+def formatar_para_exibicao(df):
+    """Cópia com datas em dd/mm/aaaa e vazios como "" (para tabela, PDF e exportações)."""
+    df = df.copy()
+    for col in df.columns:
+        if col in COLUNAS_DATA:
+            df[col] = df[col].dt.strftime("%d/%m/%Y").fillna("")
+        else:
+            df[col] = df[col].astype(object).where(df[col].notna(), "")
+    return df
+
+
+def montar_links_contrato(df):
+    """HTML do Contrato com link para o Comprasnet (apenas URLs http/https)."""
+    links = df["Link Comprasnet"].astype(str)
+    validos = (
+        df["Link Comprasnet"].notna()
+        & (links.str.strip() != "")
+        & links.str.startswith(("http://", "https://"))
+    )
+    html = (
+        '<a href="' + links + '" target="_blank" '
+        'style="color: #0b2b57; text-decoration: none; font-weight: bold;">'
+        + df["Contrato"].astype(str)
+        + "</a>"
+    )
+    return html.where(validos, df["Contrato"]).astype(TIPO_TEXTO)
+
+
+def construir_base(df):
+    """Monta uma nova versão completa; só é publicada depois de pronta."""
+    # Ordem global: Término da Execução mais recente em cima (vazios no fim).
+    # Com o DataFrame já ordenado, qualquer filtro preserva essa ordem.
+    termino_exec = df["Término da Execução"].reset_index(drop=True)
+    ordem = termino_exec.sort_values(ascending=False, kind="stable").index
+    df = df.iloc[ordem].reset_index(drop=True)
+    df["Contrato_Link"] = montar_links_contrato(df)
+
+    return BaseContratos(
+        versao=calcular_versao(df),
+        df=df,
+        carregada_em=datetime.now(),
+        indice_contrato=IndiceTrigramas(df["Contrato"]),
+        indice_objeto=IndiceTrigramas(df["Objeto"]),
+        bitmaps={col: IndiceBitmap(df[col]) for col in COLUNAS_CATEGORICAS},
+        # Linhas sem Status da Vigência nunca são exibidas
+        bits_validos=empacotar(df["Status da Vigência"].to_numpy() != ""),
+    )
+
+
+_base_atual = None
+_lock_publicacao = threading.Lock()
+_lock_carga = threading.Lock()
+
+_evento_atualizacao = threading.Event()
+_thread_atualizacao = None
+_intervalo_adiado = None
+
+# Versões recentes por identificador, da mais antiga para a vigente
+_versoes_retidas = OrderedDict()
+
+# Funções chamadas (com a nova BaseContratos) a cada versão publicada
+_ao_publicar = []
+
+
+def registrar_ao_publicar(funcao):
+    """Registra uma função a ser chamada sempre que uma nova versão for publicada."""
+    _ao_publicar.append(funcao)
+    return funcao
+
+
+def _publicar(nova, substituir=False):
+    """Troca atomicamente a versão vigente (uma única atribuição).
+
+    Com `substituir`, uma versão igual à vigente também é trocada (outra
+    cópia dos mesmos dados), sem log nem notificações.
+    """
+    global _base_atual
+
+    with _lock_publicacao:
+        atual = _base_atual
+        if atual is not None and atual.versao == nova.versao:
+            if substituir:
+                _base_atual = nova
+                _versoes_retidas[nova.versao] = nova
+                return nova
+            return atual
+        _base_atual = nova
+        _reter_versao(nova)
+
+    logger.info(
+        "Dados de contratos publicados: versão %s (%d linhas)",
+        nova.versao,
+        len(nova.df),
+    )
+
+    for funcao in list(_ao_publicar):
+        try:
+            funcao(nova)
+        except Exception:
+            logger.exception(
+                "Falha ao processar a publicação da versão %s", nova.versao
+            )
+    return nova
+
+
+def _reter_versao(base):
+    _versoes_retidas.pop(base.versao, None)
+    _versoes_retidas[base.versao] = base
+    while len(_versoes_retidas) > VERSOES_RETIDAS:
+        _versoes_retidas.popitem(last=False)
+
+
+def publicar_base(nova, substituir=False):
+    """Publica uma versão montada fora daqui (ex.: servicos/base_compartilhada.py)."""
+    return _publicar(nova, substituir)
+
+
+def atualizar_base():
+    """Baixa a planilha, monta a nova versão e a publica."""
+    # Evita downloads simultâneos (carga inicial x thread de atualização)
+    with _lock_carga:
+        nova = construir_base(carregar_dados_contratos())
+    return _publicar(nova)
+
+
+def _carga_inicial():
+    """Publica o snapshot local, se houver, e revalida a planilha em segundo plano."""
+    with _lock_carga:
+        if _base_atual is not None:
+            return _base_atual
+        df = carregar_snapshot()
+        if df is not None:
+            base = _publicar(construir_base(df))
+            solicitar_atualizacao()
+            return base
+
+    # Sem snapshot: a primeira carga precisa esperar a planilha
+    return atualizar_base()
+
+
+def obter_base():
+    """Retorna a versão vigente dos dados, sem esperar por atualizações."""
+    base = _base_atual
+    if base is None:
+        base = _carga_inicial()
+    return base
+
+
+def obter_versao(versao):
+    """Versão `versao` dos dados, se ainda mantida em memória; senão None."""
+    return _versoes_retidas.get(versao)
+
+
+def base_publicada():
+    """Versão vigente ou None, sem disparar a carga (para verificações)."""
+    return _base_atual
+
+
+# --------------------------------------------------
+# Atualização em segundo plano
+# --------------------------------------------------
+def _laco_atualizacao(intervalo):
+    while True:
+        _evento_atualizacao.wait(intervalo)
+        _evento_atualizacao.clear()
+        try:
+            atualizar_base()
+        except Exception:
+            atual = _base_atual
+            logger.exception(
+                "Falha ao atualizar os dados de contratos; mantendo a versão %s",
+                atual.versao if atual is not None else "-",
+            )
+
+
+def solicitar_atualizacao():
+    """Antecipa a próxima atualização sem bloquear quem chamou."""
+    _evento_atualizacao.set()
+
+
+def aguardar_solicitacao(tempo):
+    """Espera até `tempo` segundos por `solicitar_atualizacao`; True se houve pedido."""
+    solicitada = _evento_atualizacao.wait(tempo)
+    _evento_atualizacao.clear()
+    return solicitada
+
+
+def iniciar_atualizador(intervalo=INTERVALO_ATUALIZACAO):
+    """Inicia (uma única vez por processo) a thread de atualização.
+
+    Com ADIAR_ATUALIZADOR, só guarda o intervalo; a thread nasce em
+    `iniciar_atualizador_no_worker`.
+    """
+    global _thread_atualizacao, _intervalo_adiado
+
+    if ADIAR_ATUALIZADOR:
+        _intervalo_adiado = intervalo
+        return None
+
+    with _lock_publicacao:
+        if _thread_atualizacao is not None and _thread_atualizacao.is_alive():
+            return _thread_atualizacao
+
+        _thread_atualizacao = threading.Thread(
+            target=_laco_atualizacao,
+            args=(intervalo,),
+            name="atualizador-contratos",
+            daemon=True,
+        )
+        _thread_atualizacao.start()
+        return _thread_atualizacao
+
+
+# --------------------------------------------------
+# gunicorn preload_app: carga única no mestre, compartilhada via fork
+# --------------------------------------------------
+def preparar_para_fork(congelar=True):
+    """Carrega a versão mais recente no processo mestre, antes do fork.
+
+    Se a carga veio do snapshot, a planilha é revalidada aqui mesmo, uma vez,
+    em vez de uma vez por worker. Em seguida os objetos são congelados no GC
+    para que as coletas dos workers não toquem nas páginas compartilhadas
+    (copy-on-write).
+    """
+    obter_base()
+    if _evento_atualizacao.is_set():
+        _evento_atualizacao.clear()
+        try:
+            atualizar_base()
+        except Exception:
+            logger.exception(
+                "Falha ao revalidar a planilha no mestre; mantendo o snapshot"
+            )
+    if congelar:
+        gc.freeze()
+
+
+def iniciar_atualizador_no_worker():
+    """Inicia, depois do fork, a thread adiada por ADIAR_ATUALIZADOR."""
+    global ADIAR_ATUALIZADOR
+
+    ADIAR_ATUALIZADOR = False
+    if _intervalo_adiado is not None:
+        return iniciar_atualizador(_intervalo_adiado)
+    return None
@@ -0,0 +1,230 @@
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from servicos.dados_contratos import COLUNAS_DATA, formatar_para_exibicao
+
+
+# --------------------------------------------------
+# Exportação das linhas filtradas em CSV e XLSX (em fluxo)
+# --------------------------------------------------
+COLUNAS_EXPORTACAO = [
+    "Contrato",
+    "Setor",
+    "Grupo",
+    "Objeto",
+    "Empresa Contratada",
+    "Início da Vigência",
+    "Término da Execução",
+    "Término da Vigência",
+    "Status da Vigência",
+    "Link Comprasnet",
+]
+
+# Linhas convertidas por vez; a memória usada não depende do total
+TAMANHO_BLOCO_EXPORTACAO = 2000
+
+
+def _blocos(df, linhas, colunas):
+    # Colunas selecionadas uma vez, fora do laço dos blocos
+    df = df[[c for c in colunas if c in df.columns]]
+    for inicio in range(0, len(linhas), TAMANHO_BLOCO_EXPORTACAO):
+        yield df.iloc[linhas[inicio:inicio + TAMANHO_BLOCO_EXPORTACAO]]
+
+
+# --------------------------------------------------
+# CSV
+# --------------------------------------------------
+def gerar_csv(df, linhas, colunas=COLUNAS_EXPORTACAO):
+    """Gera o CSV em pedaços (bytes), um bloco de linhas por vez.
+
+    Separador ";", BOM UTF-8 e fim de linha CRLF, como o Excel em português
+    espera.
+    """
+    cabecalho = True
+    for bloco in _blocos(df, linhas, colunas):
+        texto = formatar_para_exibicao(bloco).to_csv(
+            sep=";", index=False, header=cabecalho, lineterminator="\r\n"
+        )
+        yield (("\ufeff" if cabecalho else "") + texto).encode("utf-8")
+        cabecalho = False
+
+    if cabecalho:
+        # Nenhuma linha: só o cabeçalho
+        colunas = [c for c in colunas if c in df.columns]
+        yield ("\ufeff" + ";".join(colunas) + "\r\n").encode("utf-8")
+
+
+# --------------------------------------------------
+# XLSX (SpreadsheetML mínimo, escrito em fluxo dentro do zip)
+# --------------------------------------------------
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" '
+    'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    "</Types>"
+)
+
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Contratos" sheetId="1" r:id="rId1"/></sheets>'
+    "</workbook>"
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    "</Relationships>"
+)
+
+# Estilo 0: padrão; 1: data dd/mm/aaaa; 2: cabeçalho em negrito
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="dd/mm/yyyy"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border>'
+    "</borders>"
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/>'
+    "</cellStyleXfs>"
+    '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" '
+    'applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    "</cellXfs>"
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/>'
+    "</cellStyles>"
+    "</styleSheet>"
+)
+
+_INICIO_PLANILHA = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    "<sheetData>"
+)
+
+_FIM_PLANILHA = "</sheetData></worksheet>"
+
+# Caracteres de controle não permitidos em XML 1.0
+_INVALIDOS_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# Dia 0 das datas seriais do Excel
+_EPOCA_EXCEL = np.datetime64("1899-12-30", "D")
+
+
+def _celula_texto(texto, estilo=0):
+    texto = escape(_INVALIDOS_XML.sub("", texto))
+    atributos = f' s="{estilo}"' if estilo else ""
+    return (
+        f'<c t="inlineStr"{atributos}><is><t xml:space="preserve">{texto}</t></is></c>'
+    )
+
+
+def _celulas_coluna(serie):
+    """XML das células de uma coluna (datas como número serial formatado)."""
+    if serie.name in COLUNAS_DATA:
+        dias = (serie.to_numpy("datetime64[D]") - _EPOCA_EXCEL).astype("int64")
+        vazias = serie.isna().to_numpy()
+        return [
+            "<c/>" if vazia else f'<c s="1"><v>{dia}</v></c>'
+            for dia, vazia in zip(dias.tolist(), vazias.tolist())
+        ]
+    valores = serie.astype(object).where(serie.notna(), "")
+    return [_celula_texto(str(v)) if v != "" else "<c/>" for v in valores]
+
+
+def _linhas_xml(bloco):
+    colunas = [_celulas_coluna(bloco[c]) for c in bloco.columns]
+    return "".join(f"<row>{''.join(celulas)}</row>" for celulas in zip(*colunas))
+
+
+class _SaidaFluxo(io.RawIOBase):
+    """Arquivo só de escrita, sem seek: o zipfile grava e o gerador esvazia."""
+
+    def __init__(self):
+        self._pedacos = []
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self._pedacos.append(bytes(dados))
+        return len(dados)
+
+    def esvaziar(self):
+        dados = b"".join(self._pedacos)
+        self._pedacos = []
+        return dados
+
+
+def gerar_xlsx(df, linhas, colunas=COLUNAS_EXPORTACAO):
+    """Gera o XLSX em pedaços (bytes), sem montar o arquivo inteiro em memória.
+
+    O zip é escrito num fluxo sem seek (tamanhos em data descriptors) e as
+    células usam texto inline, sem tabela de strings compartilhadas.
+    """
+    colunas = [c for c in colunas if c in df.columns]
+    saida = _SaidaFluxo()
+
+    with zipfile.ZipFile(saida, "w", compression=zipfile.ZIP_DEFLATED) as arquivo:
+        for nome, conteudo in (
+            ("[Content_Types].xml", _CONTENT_TYPES),
+            ("_rels/.rels", _RELS),
+            ("xl/workbook.xml", _WORKBOOK),
+            ("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS),
+            ("xl/styles.xml", _STYLES),
+        ):
+            arquivo.writestr(nome, conteudo)
+
+        with arquivo.open("xl/worksheets/sheet1.xml", "w") as planilha:
+            cabecalho = "".join(_celula_texto(c, estilo=2) for c in colunas)
+            planilha.write(f"{_INICIO_PLANILHA}<row>{cabecalho}</row>".encode("utf-8"))
+            yield saida.esvaziar()
+
+            for bloco in _blocos(df, linhas, colunas):
+                planilha.write(_linhas_xml(bloco).encode("utf-8"))
+                yield saida.esvaziar()
+
+            planilha.write(_FIM_PLANILHA.encode("utf-8"))
+
+    yield saida.esvaziar()
+
+
+# --------------------------------------------------
+# Formatos disponíveis
+# --------------------------------------------------
+FORMATOS_EXPORTACAO = {
+    "csv": (gerar_csv, "text/csv"),
+    "xlsx": (
+        gerar_xlsx,
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+}
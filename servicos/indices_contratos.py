@@ -0,0 +1,152 @@
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+
+# --------------------------------------------------
+# Normalização de texto (sem acentos e sem caixa)
+# --------------------------------------------------
+def normalizar_texto(valor):
+    """Converte para minúsculas e remove acentos ("Ação" -> "acao")."""
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return ""
+    texto = unicodedata.normalize("NFKD", str(valor).casefold())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+# --------------------------------------------------
+# Índice de trigramas para busca parcial (Contrato, Objeto)
+# --------------------------------------------------
+class IndiceTrigramas:
+    """Índice invertido trigrama -> linhas, construído uma vez por versão dos dados.
+
+    A busca intersecta as listas dos trigramas do termo para obter as linhas
+    candidatas e confirma a substring apenas nelas.
+    """
+
+    TAMANHO = 3
+
+    def __init__(self, valores):
+        self.textos = [normalizar_texto(v) for v in valores]
+        self.todas = np.arange(len(self.textos), dtype=np.int32)
+
+        postagens = defaultdict(list)
+        n = self.TAMANHO
+        for linha, texto in enumerate(self.textos):
+            for trigrama in {texto[i:i + n] for i in range(len(texto) - n + 1)}:
+                postagens[trigrama].append(linha)
+
+        self.postagens = {
+            trigrama: np.asarray(linhas, dtype=np.int32)
+            for trigrama, linhas in postagens.items()
+        }
+
+    @classmethod
+    def de_arrays(cls, textos, postagens):
+        """Reconstrói o índice já calculado (ex.: lido de um arquivo mapeado)."""
+        indice = cls.__new__(cls)
+        indice.textos = textos
+        indice.todas = np.arange(len(textos), dtype=np.int32)
+        indice.postagens = postagens
+        return indice
+
+    def _candidatas(self, termo):
+        n = self.TAMANHO
+        if len(termo) < n:
+            # Termos curtos não formam trigramas: confirma em todas as linhas
+            return self.todas
+
+        listas = []
+        for trigrama in {termo[i:i + n] for i in range(len(termo) - n + 1)}:
+            linhas = self.postagens.get(trigrama)
+            if linhas is None:
+                return self.todas[:0]
+            listas.append(linhas)
+
+        listas.sort(key=len)
+        candidatas = listas[0]
+        for linhas in listas[1:]:
+            candidatas = np.intersect1d(candidatas, linhas, assume_unique=True)
+            if not len(candidatas):
+                break
+        return candidatas
+
+    def buscar(self, termo):
+        """Retorna as posições (ordenadas) das linhas que contêm o termo."""
+        termo = normalizar_texto(termo)
+        if not termo:
+            return self.todas
+
+        textos = self.textos
+        candidatas = self._candidatas(termo)
+        return np.fromiter(
+            (linha for linha in candidatas if termo in textos[linha]),
+            dtype=np.int32,
+        )
+
+
+# --------------------------------------------------
+# Bitsets por valor (Setor, Grupo, Empresa, Status)
+# --------------------------------------------------
+def empacotar(mascara):
+    """Converte uma máscara booleana em bitset (1 bit por linha)."""
+    return np.packbits(np.asarray(mascara, dtype=bool))
+
+
+def desempacotar(bits, tamanho):
+    """Converte um bitset de volta em máscara booleana com `tamanho` linhas."""
+    return np.unpackbits(bits, count=tamanho).astype(bool)
+
+
+class IndiceBitmap:
+    """Um bitset por valor distinto de uma coluna categórica.
+
+    Combinar filtros vira OR dentro da coluna e AND entre colunas, operando
+    sobre bytes empacotados, sem percorrer o DataFrame.
+    """
+
+    def __init__(self, valores):
+        serie = pd.Series(valores).reset_index(drop=True)
+        # Códigos na ordem alfabética dos valores (-1 para vazios)
+        codigos, categorias = pd.factorize(
+            serie.astype(str).where(serie.notna()), sort=True
+        )
+
+        self.tamanho = len(codigos)
+        self.codigos = codigos.astype(np.int32)
+        self.categorias = [str(valor) for valor in categorias]
+        self.vazio = empacotar(np.zeros(self.tamanho, dtype=bool))
+        self.bitsets = {
+            valor: empacotar(codigos == codigo)
+            for codigo, valor in enumerate(self.categorias)
+        }
+
+    @classmethod
+    def de_arrays(cls, codigos, categorias, bitsets):
+        """Reconstrói o índice já calculado (ex.: lido de um arquivo mapeado)."""
+        indice = cls.__new__(cls)
+        indice.tamanho = len(codigos)
+        indice.codigos = codigos
+        indice.categorias = categorias
+        indice.vazio = empacotar(np.zeros(indice.tamanho, dtype=bool))
+        indice.bitsets = bitsets
+        return indice
+
+    def selecionar(self, valores):
+        """OR dos bitsets dos valores escolhidos (valores ausentes não marcam linhas)."""
+        if isinstance(valores, str):
+            valores = [valores]
+
+        resultado = self.vazio.copy()
+        for valor in valores:
+            bits = self.bitsets.get(str(valor))
+            if bits is not None:
+                np.bitwise_or(resultado, bits, out=resultado)
+        return resultado
+
+    def contar(self, linhas):
+        """Quantidade de linhas por valor (na ordem de `categorias`) dentre `linhas`."""
+        codigos = self.codigos[linhas]
+        return np.bincount(codigos[codigos >= 0], minlength=len(self.categorias))
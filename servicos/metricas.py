@@ -0,0 +1,295 @@
+import fcntl
+import functools
+import itertools
+import multiprocessing
+import os
+import time
+
+from flask import g, request
+
+# prometheus_client é opcional: sem ele, as métricas viram operações vazias
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+
+# --------------------------------------------------
+# Configuração
+# --------------------------------------------------
+METRICAS_ATIVAS = (
+    os.environ.get("CONTRATOS_METRICAS", "1") != "0" and prometheus_client is not None
+)
+
+# Com gunicorn, cada processo grava seus valores nesta pasta e o /metrics
+# soma todos (ver gunicorn.conf.py); sem ela, valem só os do processo
+MULTIPROCESSO = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+ROTA_CALLBACKS = "/_dash-update-component"
+
+BUCKETS_SEGUNDOS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120
+)
+BUCKETS_BYTES = tuple(256 * 4**i for i in range(10))  # 256 B a 64 MB
+BUCKETS_COMPRESSAO = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 1)
+BUCKETS_LINHAS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000, 1000000)
+
+
+# --------------------------------------------------
+# Identificação dos processos (modo multiprocesso)
+# --------------------------------------------------
+# Cada processo grava seus valores em <tipo>_<identificador>.db. Os workers
+# usam o pid; as tarefas em segundo plano (um processo novo a cada PDF) usam
+# uma vaga reaproveitada, "tarefa<n>", para que os arquivos não se acumulem
+# na pasta a cada tarefa. Os contadores de uma vaga seguem acumulando de uma
+# tarefa para a seguinte.
+_identificacao = {"pid": None, "valor": None, "lock": None}
+
+
+def _processo_de_tarefa():
+    """Processo criado por multiprocessing/multiprocess (tarefas do Dash)."""
+    if multiprocessing.parent_process() is not None:
+        return True
+    try:
+        import multiprocess
+    except ImportError:
+        return False
+    return multiprocess.parent_process() is not None
+
+
+def _reservar_vaga():
+    """Primeira vaga livre; o lock fica com o processo até ele terminar."""
+    pasta = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    for n in itertools.count():
+        fd = os.open(
+            os.path.join(pasta, f"tarefa{n}.lock"),
+            os.O_RDWR | os.O_CREAT | os.O_CLOEXEC,
+            0o644,
+        )
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            continue
+        _identificacao["lock"] = fd
+        return f"tarefa{n}"
+
+
+def _identificador_processo():
+    pid = os.getpid()
+    if _identificacao["pid"] != pid:
+        _identificacao["pid"] = pid
+        _identificacao["valor"] = (
+            _reservar_vaga() if _processo_de_tarefa() else str(pid)
+        )
+    return _identificacao["valor"]
+
+
+if METRICAS_ATIVAS and MULTIPROCESSO:
+    # Precisa valer antes de qualquer métrica ser criada
+    from prometheus_client import values as _valores
+
+    _valores.ValueClass = _valores.MultiProcessValue(_identificador_processo)
+
+
+class _Nula:
+    """Métrica que não registra nada (sem prometheus_client ou desativada)."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, valor):
+        pass
+
+    def inc(self, valor=1):
+        pass
+
+    def set(self, valor):
+        pass
+
+
+def _metrica(tipo, nome, descricao, rotulos=(), **opcoes):
+    if not METRICAS_ATIVAS:
+        return _Nula()
+    return getattr(prometheus_client, tipo)(nome, descricao, rotulos, **opcoes)
+
+
+# --------------------------------------------------
+# Métricas
+# --------------------------------------------------
+# Requisições (callbacks Dash identificados pelo nome da função)
+DURACAO_REQUISICAO = _metrica(
+    "Histogram",
+    "contratos_requisicao_segundos",
+    "Tempo de resposta por rota e callback Dash",
+    ["rota", "callback"],
+    buckets=BUCKETS_SEGUNDOS,
+)
+TAMANHO_RESPOSTA = _metrica(
+    "Histogram",
+    "contratos_resposta_bytes",
+    "Tamanho da resposta antes da compressão, por rota e callback Dash",
+    ["rota", "callback"],
+    buckets=BUCKETS_BYTES,
+)
+ERROS_REQUISICAO = _metrica(
+    "Counter",
+    "contratos_requisicao_erros",
+    "Respostas com status 5xx por rota e callback Dash",
+    ["rota", "callback"],
+)
+
+# Compressão das respostas (servicos/compressao.py); codificação "nenhuma"
+# para as que saíram sem compressão
+BYTES_ORIGINAIS = _metrica(
+    "Counter",
+    "contratos_compressao_bytes_originais",
+    "Bytes das respostas antes da compressão, por rota e codificação",
+    ["rota", "codificacao"],
+)
+BYTES_ENVIADOS = _metrica(
+    "Counter",
+    "contratos_compressao_bytes_enviados",
+    "Bytes das respostas enviados, por rota e codificação",
+    ["rota", "codificacao"],
+)
+DURACAO_COMPRESSAO = _metrica(
+    "Histogram",
+    "contratos_compressao_segundos",
+    "Tempo gasto comprimindo cada resposta, por rota e codificação",
+    ["rota", "codificacao"],
+    buckets=BUCKETS_COMPRESSAO,
+)
+
+# Callbacks executados fora da requisição (background, ver medir_callback)
+DURACAO_CALLBACK = _metrica(
+    "Histogram",
+    "contratos_callback_execucao_segundos",
+    "Tempo de execução da função do callback",
+    ["callback"],
+    buckets=BUCKETS_SEGUNDOS,
+)
+
+# Consultas e caches
+LINHAS_FILTRADAS = _metrica(
+    "Histogram",
+    "contratos_linhas_filtradas",
+    "Quantidade de linhas retornadas pelos filtros",
+    buckets=BUCKETS_LINHAS,
+)
+CONSULTAS_CACHE = _metrica(
+    "Counter",
+    "contratos_cache_consultas",
+    "Consultas aos caches por resultado (acerto/falha)",
+    ["cache", "resultado"],
+)
+
+# Planilha e versão dos dados
+DURACAO_PLANILHA = _metrica(
+    "Histogram",
+    "contratos_planilha_download_segundos",
+    "Tempo de download e leitura da planilha de contratos",
+    buckets=BUCKETS_SEGUNDOS,
+)
+FALHAS_PLANILHA = _metrica(
+    "Counter",
+    "contratos_planilha_falhas",
+    "Falhas ao baixar ou ler a planilha de contratos",
+)
+DADOS_VERIFICADOS_EM = _metrica(
+    "Gauge",
+    "contratos_dados_verificados_em_segundos",
+    "Horário (Unix) da última leitura bem-sucedida da planilha",
+    multiprocess_mode="max",
+)
+LINHAS_DADOS = _metrica(
+    "Gauge",
+    "contratos_dados_linhas",
+    "Quantidade de linhas da versão publicada",
+    multiprocess_mode="mostrecent",
+)
+
+
+def registrar_publicacao(base):
+    """Atualiza os indicadores da versão dos dados (chamada a cada publicação)."""
+    LINHAS_DADOS.set(len(base.df))
+
+
+class MedidorCache:
+    """Contadores de acerto/falha de um cache, com os rótulos já resolvidos."""
+
+    def __init__(self, nome):
+        self.acerto = CONSULTAS_CACHE.labels(nome, "acerto")
+        self.falha = CONSULTAS_CACHE.labels(nome, "falha")
+
+    def registrar(self, acertou):
+        (self.acerto if acertou else self.falha).inc()
+
+
+def medir_callback(funcao):
+    """Mede o tempo de execução de um callback, onde quer que ele rode.
+
+    Necessário nos callbacks em segundo plano, cujo trabalho acontece num
+    processo separado e não na requisição que o dispara.
+    """
+    duracao = DURACAO_CALLBACK.labels(funcao.__name__)
+
+    @functools.wraps(funcao)
+    def medida(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            duracao.observe(time.perf_counter() - inicio)
+
+    return medida
+
+
+# --------------------------------------------------
+# Hooks do Flask
+# --------------------------------------------------
+def _nome_callback(app_dash):
+    """Nome da função do callback Dash chamado (ou "" fora de callbacks)."""
+    if request.path != ROTA_CALLBACKS:
+        return ""
+    corpo = request.get_json(silent=True) or {}
+    item = app_dash.callback_map.get(corpo.get("output"))
+    if item is None:
+        return "desconhecido"
+    return getattr(item["callback"], "__name__", "desconhecido")
+
+
+def _iniciar_medicao():
+    g.inicio_metricas = time.perf_counter()
+
+
+def _medir_resposta(app_dash, resposta):
+    inicio = g.pop("inicio_metricas", None)
+    if inicio is None:
+        return resposta
+
+    # Rotas inexistentes ficam juntas (evita um rótulo por URL)
+    rota = request.url_rule.rule if request.url_rule else "desconhecida"
+    callback = _nome_callback(app_dash)
+
+    DURACAO_REQUISICAO.labels(rota, callback).observe(time.perf_counter() - inicio)
+    if not resposta.is_streamed:
+        TAMANHO_RESPOSTA.labels(rota, callback).observe(
+            resposta.calculate_content_length() or 0
+        )
+    if resposta.status_code >= 500:
+        ERROS_REQUISICAO.labels(rota, callback).inc()
+    return resposta
+
+
+def instalar_metricas(app_dash):
+    """Mede as requisições do Flask do app, inclusive cada callback Dash.
+
+    Deve ser chamada depois de `instalar_compressao`: os hooks `after_request`
+    rodam na ordem inversa, e o tamanho medido é o da resposta original.
+    """
+    if not METRICAS_ATIVAS:
+        return
+    server = app_dash.server
+    server.before_request(_iniciar_medicao)
+    server.after_request(functools.partial(_medir_resposta, app_dash))
@@ -0,0 +1,169 @@
+import cProfile
+import functools
+import hmac
+import io
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+from flask import has_request_context, request
+
+from servicos.dados_contratos import DIR_CACHE
+
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------
+# Perfilamento sob demanda dos callbacks (cProfile + tracemalloc)
+# --------------------------------------------------
+# Desligado por padrão. Com CONTRATOS_PERFIL=1, uma fração das execuções
+# (CONTRATOS_PERFIL_TAXA) é perfilada; com CONTRATOS_PERFIL_TOKEN definido,
+# uma requisição com o cabeçalho X-Contratos-Perfil igual ao token é sempre
+# perfilada, mesmo com o modo por amostragem desligado.
+PERFIL_ATIVO = os.environ.get("CONTRATOS_PERFIL", "0") == "1"
+TAXA_PERFIL = float(os.environ.get("CONTRATOS_PERFIL_TAXA", 0.05))
+TOKEN_PERFIL = os.environ.get("CONTRATOS_PERFIL_TOKEN", "")
+CABECALHO_PERFIL = "X-Contratos-Perfil"
+
+DIR_PERFIS = os.environ.get("CONTRATOS_PERFIL_DIR", os.path.join(DIR_CACHE, "perfis"))
+
+# Quantidade máxima de perfis guardados; os mais antigos saem primeiro
+MAX_PERFIS = int(os.environ.get("CONTRATOS_PERFIL_MAX", 200))
+
+# Tamanho dos relatórios e profundidade das pilhas do tracemalloc
+TOP_FUNCOES = 30
+TOP_ALOCACOES = 25
+QUADROS_TRACEMALLOC = 8
+
+# tracemalloc é global no processo: um perfil por vez; as demais execuções
+# simultâneas seguem sem perfil
+_lock_perfil = threading.Lock()
+
+
+def _motivo_perfil():
+    """"cabecalho", "amostra" ou None (execução sem perfil)."""
+    if TOKEN_PERFIL and has_request_context():
+        # Callbacks em segundo plano rodam num processo criado a partir da
+        # requisição e ainda enxergam seus cabeçalhos
+        enviado = request.headers.get(CABECALHO_PERFIL, "")
+        if enviado and hmac.compare_digest(enviado, TOKEN_PERFIL):
+            return "cabecalho"
+    if PERFIL_ATIVO and random.random() < TAXA_PERFIL:
+        return "amostra"
+    return None
+
+
+# --------------------------------------------------
+# Relatórios
+# --------------------------------------------------
+def _texto_pstats(perfil):
+    saida = io.StringIO()
+    estatisticas = pstats.Stats(perfil, stream=saida)
+    estatisticas.sort_stats("cumulative").print_stats(TOP_FUNCOES)
+    return saida.getvalue()
+
+
+def _texto_alocacoes(instantaneo):
+    instantaneo = instantaneo.filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+    )
+    linhas = []
+    for item in instantaneo.statistics("traceback")[:TOP_ALOCACOES]:
+        linhas.append(f"{item.size / 1024:.1f} KiB em {item.count} blocos")
+        quadros = item.traceback.format(most_recent_first=True)
+        linhas.extend(f"    {quadro}" for quadro in quadros)
+    return "\n".join(linhas)
+
+
+def _remover_antigos():
+    nomes = sorted(n for n in os.listdir(DIR_PERFIS) if n.endswith(".pstats"))
+    for nome in nomes[: max(len(nomes) - MAX_PERFIS, 0)]:
+        base = os.path.join(DIR_PERFIS, nome[: -len(".pstats")])
+        for caminho in (f"{base}.pstats", f"{base}.txt"):
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+
+
+def _gravar(nome, motivo, resultado, segundos, perfil, pico, instantaneo):
+    """Grava `<horário>-<callback>-<pid>.pstats` e o resumo `.txt` ao lado."""
+    os.makedirs(DIR_PERFIS, exist_ok=True)
+    agora = datetime.now()
+    base = os.path.join(
+        DIR_PERFIS, f"{agora:%Y%m%d-%H%M%S-%f}-{nome}-{os.getpid()}"
+    )
+    perfil.dump_stats(f"{base}.pstats")
+
+    with open(f"{base}.txt", "w", encoding="utf-8") as f:
+        f.write(
+            f"callback: {nome}\n"
+            f"pid: {os.getpid()}\n"
+            f"horario: {agora.isoformat(timespec='seconds')}\n"
+            f"motivo: {motivo}\n"
+            f"resultado: {resultado}\n"
+            f"duracao_segundos: {segundos:.6f}\n"
+            f"pico_memoria_bytes: {pico}\n"
+        )
+        f.write("\n== Tempo (cProfile, por tempo acumulado) ==\n")
+        f.write(_texto_pstats(perfil))
+        if instantaneo is not None:
+            f.write("\n== Alocações ainda vivas ao final (tracemalloc) ==\n")
+            f.write(_texto_alocacoes(instantaneo))
+            f.write("\n")
+
+    _remover_antigos()
+
+
+# --------------------------------------------------
+# Decorador
+# --------------------------------------------------
+def perfilar(funcao):
+    """Perfila a função (tempo e alocações) quando o perfilamento a escolher."""
+    nome = funcao.__name__
+
+    @functools.wraps(funcao)
+    def perfilada(*args, **kwargs):
+        motivo = _motivo_perfil()
+        if motivo is None or not _lock_perfil.acquire(blocking=False):
+            return funcao(*args, **kwargs)
+
+        try:
+            # Se outro código já usa o tracemalloc, só o tempo é medido
+            rastrear = not tracemalloc.is_tracing()
+            if rastrear:
+                tracemalloc.start(QUADROS_TRACEMALLOC)
+
+            perfil = cProfile.Profile()
+            resultado = "ok"
+            inicio = time.perf_counter()
+            try:
+                return perfil.runcall(funcao, *args, **kwargs)
+            except BaseException as erro:
+                # PreventUpdate também chega aqui
+                resultado = type(erro).__name__
+                raise
+            finally:
+                segundos = time.perf_counter() - inicio
+                instantaneo = pico = None
+                if rastrear:
+                    instantaneo = tracemalloc.take_snapshot()
+                    pico = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                try:
+                    _gravar(nome, motivo, resultado, segundos, perfil, pico, instantaneo)
+                except OSError:
+                    logger.warning("Não foi possível gravar o perfil em %s", DIR_PERFIS)
+        finally:
+            _lock_perfil.release()
+
+    return perfilada
@@ -0,0 +1,58 @@
+from reportlab.lib.units import inch
+
+from servicos.relatorio_pdf import (
+    carimbar_data_hora,
+    montar_modelo_pdf,
+    montar_tabela,
+)
+
+
+# --------------------------------------------------
+# Colunas do relatório de contratos (nome, largura)
+# --------------------------------------------------
+COLUNAS_PDF = [
+    ("Contrato", 0.8 * inch),
+    ("Setor", 0.9 * inch),
+    ("Grupo", 0.9 * inch),
+    ("Objeto", 2.2 * inch),
+    ("Empresa Contratada", 1.8 * inch),
+    ("Início da Vigência", 1.0 * inch),
+    ("Término da Execução", 1.1 * inch),
+    ("Término da Vigência", 1.1 * inch),
+    ("Status da Vigência", 1.1 * inch),
+]
+
+TITULO_PDF = "RELATÓRIO DE CONTRATOS ATIVOS - UASG: 153030 - Campus Itajubá<br/>"
+
+
+def cores_status(df):
+    """Fundo das linhas vencidas e próximas do vencimento."""
+    status = df["Status da Vigência"].astype(str).str.strip().str.lower()
+    return [
+        (status.str.contains("vencido").to_numpy(), "#ffcccc"),
+        (status.str.contains("pr[óo]ximo do vencimento").to_numpy(), "#ffffcc"),
+    ]
+
+
+def montar_tabela_contratos(df):
+    """LongTable do relatório, com cores por status calculadas de forma vetorizada."""
+    return montar_tabela(df, COLUNAS_PDF, cores_status(df))
+
+
+# --------------------------------------------------
+# Relatório PDF de contratos
+# --------------------------------------------------
+def montar_pdf_contratos(df, progresso=None):
+    """Gera o PDF do relatório a partir das linhas já formatadas para exibição.
+
+    `progresso(linhas_desenhadas, total_linhas)`, se informado, é chamado a
+    cada página da tabela já desenhada.
+    """
+    return carimbar_data_hora(montar_modelo_pdf_contratos(df, progresso))
+
+
+def montar_modelo_pdf_contratos(df, progresso=None):
+    """PDF do relatório com o marcador no lugar do horário (reaproveitável)."""
+    if "Status da Vigência" not in df.columns:
+        df = df.assign(**{"Status da Vigência": ""})
+    return montar_modelo_pdf(TITULO_PDF, df, COLUNAS_PDF, cores_status(df), progresso)
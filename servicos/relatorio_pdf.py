@@ -0,0 +1,343 @@
+import os
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+
+import numpy as np
+from pytz import timezone
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import (
+    Image,
+    LongTable,
+    Paragraph,
+    SimpleDocTemplate,
+    Spacer,
+    Table,
+    TableStyle,
+)
+
+
+# --------------------------------------------------
+# Modelo comum dos relatórios PDF dos painéis
+# --------------------------------------------------
+# Estilos, logos e cabeçalho institucional são preparados uma vez por
+# processo; cada relatório informa apenas título, colunas e dados.
+DIR_ASSETS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets"
+)
+
+PAGINA_PDF = landscape(A4)
+
+# Marcador do horário no topo da 1ª página. A 1ª página é gravada sem
+# compressão para que o horário seja trocado byte a byte (mesmo tamanho).
+MARCADOR_DATA_HORA = "00/00/0000 00:00:00"
+
+# Linhas convertidas em células por vez
+TAMANHO_BLOCO_PDF = 500
+
+# Padding horizontal das células (LEFTPADDING + RIGHTPADDING)
+_PADDING_PDF = 4
+
+
+# --------------------------------------------------
+# Estilos
+# --------------------------------------------------
+estilos = getSampleStyleSheet()
+
+wrap_style_data = ParagraphStyle(
+    name="wrap_data",
+    fontSize=7,
+    leading=8,
+    alignment=TA_CENTER,
+    textColor=colors.black,
+)
+
+wrap_style_header = ParagraphStyle(
+    name="wrap_header",
+    fontSize=7,
+    leading=8,
+    alignment=TA_CENTER,
+    textColor=colors.white,
+)
+
+estilo_data_topo = ParagraphStyle(
+    "data_topo",
+    fontSize=9,
+    alignment=TA_RIGHT,
+    textColor="#333333",
+)
+
+estilo_instituicao = ParagraphStyle(
+    "instituicao",
+    alignment=TA_CENTER,
+    leading=16,
+)
+
+estilo_titulo = ParagraphStyle(
+    "titulo",
+    alignment=TA_CENTER,
+    fontSize=10,
+    leading=14,
+    textColor=colors.black,
+)
+
+
+def wrap_data(text):
+    return Paragraph(str(text), wrap_style_data)
+
+
+def wrap_header(text):
+    return Paragraph(str(text), wrap_style_header)
+
+
+# --------------------------------------------------
+# Cabeçalho institucional (montado uma vez por processo)
+# --------------------------------------------------
+TEXTO_INSTITUICAO = (
+    "<b><font color='#0b2b57' size=13>Ministério da Educação</font></b><br/>"
+    "<b><font color='#0b2b57' size=13>Universidade Federal de Itajubá</font></b><br/>"
+    "<font color='#0b2b57' size=11>Diretoria de Compras e Contratos</font>"
+)
+
+
+def _logo(nome):
+    """Logo de `assets/` (ou "" se não existir).
+
+    Com lazy=0 o flowable guarda um único ImageReader, que decodifica a
+    imagem uma vez (ver `_aquecer_cabecalho`) e reaproveita os dados.
+    """
+    caminho = os.path.join(DIR_ASSETS, nome)
+    if not os.path.exists(caminho):
+        return ""
+    return Image(caminho, 1.2 * inch, 1.2 * inch, lazy=0)
+
+
+@lru_cache(maxsize=None)
+def cabecalho_institucional():
+    """Flowables do topo dos relatórios: data/hora, logos e instituição.
+
+    São reaproveitados por todos os relatórios do processo; o horário fica
+    no marcador e é trocado por `carimbar_data_hora`.
+    """
+    data_hora = Table(
+        [[Paragraph(MARCADOR_DATA_HORA, estilo_data_topo)]],
+        colWidths=[PAGINA_PDF[0] - 0.6 * inch],
+    )
+
+    cabecalho = Table(
+        [
+            [
+                _logo("brasaobrasil.png"),
+                Paragraph(TEXTO_INSTITUICAO, estilo_instituicao),
+                _logo("simbolo_RGB.png"),
+            ]
+        ],
+        colWidths=[1.4 * inch, 4.2 * inch, 1.4 * inch],
+    )
+    cabecalho.setStyle(
+        TableStyle(
+            [
+                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                ("TOPPADDING", (0, 0), (-1, -1), 6),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+            ]
+        )
+    )
+
+    return (
+        data_hora,
+        Spacer(1, 0.15 * inch),
+        cabecalho,
+        Spacer(1, 0.25 * inch),
+    )
+
+
+def _aquecer_cabecalho():
+    """Monta o cabeçalho e o desenha uma vez num PDF descartado.
+
+    O desenho decodifica os logos nos ImageReader dos flowables; feito na
+    importação, os processos criados por fork (tarefas do PDF em segundo
+    plano, workers do gunicorn) já herdam o cabeçalho pronto.
+    """
+    SimpleDocTemplate(BytesIO(), pagesize=PAGINA_PDF).build(
+        list(cabecalho_institucional())
+    )
+
+
+_aquecer_cabecalho()
+
+
+# --------------------------------------------------
+# Tabela de dados (LongTable montada em blocos)
+# --------------------------------------------------
+def _celulas_coluna(valores, largura):
+    """Células de uma coluna: texto simples quando cabe numa linha, senão Paragraph.
+
+    Textos que cabem na largura e não têm marcação são desenhados iguais pela
+    Table, sem o custo de um Paragraph; a decisão é memorizada por valor.
+    """
+    largura_util = largura - _PADDING_PDF
+    simples = {}
+    celulas = []
+    for valor in valores:
+        texto = str(valor)
+        cabe = simples.get(texto)
+        if cabe is None:
+            cabe = (
+                not any(c in texto for c in "<>&")
+                and " ".join(texto.split()) == texto
+                and stringWidth(texto, wrap_style_data.fontName, wrap_style_data.fontSize)
+                <= largura_util
+            )
+            simples[texto] = cabe
+        celulas.append(texto if cabe else wrap_data(texto))
+    return celulas
+
+
+def _faixas(mascara):
+    """Intervalos contíguos (início, fim) das posições marcadas."""
+    posicoes = np.flatnonzero(mascara)
+    if not len(posicoes):
+        return []
+    quebras = np.flatnonzero(np.diff(posicoes) != 1)
+    inicios = np.r_[posicoes[0], posicoes[quebras + 1]]
+    fins = np.r_[posicoes[quebras], posicoes[-1]]
+    return list(zip(inicios.tolist(), fins.tolist()))
+
+
+def montar_tabela(df, colunas, cores_linhas=()):
+    """LongTable dos dados.
+
+    `colunas` é a lista de pares (nome da coluna, largura); `cores_linhas`,
+    pares (máscara booleana por linha, cor de fundo) aplicados em ordem.
+    """
+    nomes = [nome for nome, _ in colunas]
+    larguras = [largura for _, largura in colunas]
+    faltando = [c for c in nomes if c not in df.columns]
+    if faltando:
+        df = df.assign(**{c: "" for c in faltando})
+
+    # Colunas selecionadas uma vez, fora do laço dos blocos
+    df = df[nomes]
+
+    table_data = [[wrap_header(c) for c in nomes]]
+    for inicio in range(0, len(df), TAMANHO_BLOCO_PDF):
+        bloco = df.iloc[inicio:inicio + TAMANHO_BLOCO_PDF]
+        celulas = [
+            _celulas_coluna(bloco[c].tolist(), largura)
+            for c, largura in colunas
+        ]
+        table_data.extend(map(list, zip(*celulas)))
+
+    tbl = LongTable(table_data, colWidths=larguras, repeatRows=1)
+
+    table_styles = [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0b2b57")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("FONTSIZE", (0, 0), (-1, -1), 7),
+        # Mesmo leading do Paragraph, para o texto simples ocupar a mesma altura
+        ("LEADING", (0, 1), (-1, -1), wrap_style_data.leading),
+        ("TOPPADDING", (0, 0), (-1, -1), 2),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+        ("LEFTPADDING", (0, 0), (-1, -1), 2),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 2),
+        (
+            "ROWBACKGROUNDS",
+            (0, 1),
+            (-1, -1),
+            [colors.white, colors.HexColor("#f0f0f0")],
+        ),
+    ]
+
+    # Fundo destacado, um comando por faixa contígua de linhas.
+    # O texto continua preto, como nas células Paragraph.
+    for mascara, cor in cores_linhas:
+        for inicio, fim in _faixas(mascara):
+            table_styles.append(
+                ("BACKGROUND", (0, inicio + 1), (-1, fim + 1), colors.HexColor(cor))
+            )
+
+    tbl.setStyle(TableStyle(table_styles))
+    return tbl
+
+
+# --------------------------------------------------
+# Documento
+# --------------------------------------------------
+def carimbar_data_hora(modelo, data_hora=None):
+    """Troca o marcador do modelo pelo horário de Brasília (ou `data_hora`)."""
+    if data_hora is None:
+        tz_brasilia = timezone("America/Sao_Paulo")
+        data_hora = datetime.now(tz_brasilia).strftime("%d/%m/%Y %H:%M:%S")
+    return modelo.replace(
+        MARCADOR_DATA_HORA.encode("latin-1"), data_hora.encode("latin-1"), 1
+    )
+
+
+def _primeira_pagina_sem_compressao(canvas, doc):
+    canvas.setPageCompression(0)
+
+
+def _demais_paginas_com_compressao(canvas, doc):
+    canvas.setPageCompression(1)
+
+
+def montar_modelo_pdf(titulo, df, colunas, cores_linhas=(), progresso=None):
+    """PDF com cabeçalho institucional, título, total e a tabela dos dados.
+
+    O horário fica no marcador (modelo reaproveitável, ver
+    `carimbar_data_hora`). `progresso(linhas_desenhadas, total_linhas)`, se
+    informado, é chamado a cada página da tabela já desenhada.
+    """
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=PAGINA_PDF,
+        rightMargin=0.3 * inch,
+        leftMargin=0.3 * inch,
+        topMargin=0.2 * inch,
+        bottomMargin=0.4 * inch,
+    )
+
+    story = list(cabecalho_institucional())
+    story.append(Paragraph(titulo, estilo_titulo))
+    story.append(Spacer(1, 0.2 * inch))
+    story.append(Paragraph(f"Total de registros: {len(df)}", estilos["Normal"]))
+    story.append(Spacer(1, 0.15 * inch))
+    story.append(montar_tabela(df, colunas, cores_linhas))
+
+    if progresso is not None:
+        total = len(df)
+        desenhadas = [0]
+
+        def contar_linhas(flowable):
+            # Cada pedaço da LongTable repete o cabeçalho (1 linha)
+            if isinstance(flowable, LongTable):
+                desenhadas[0] += len(flowable._cellvalues) - 1
+                progresso(min(desenhadas[0], total), total)
+
+        doc.afterFlowable = contar_linhas
+        progresso(0, total)
+
+    doc.build(
+        story,
+        onFirstPage=_primeira_pagina_sem_compressao,
+        onLaterPages=_demais_paginas_com_compressao,
+    )
+    return buffer.getvalue()
+
+
+def montar_pdf(titulo, df, colunas, cores_linhas=(), progresso=None):
+    """Como `montar_modelo_pdf`, já com o horário atual."""
+    return carimbar_data_hora(
+        montar_modelo_pdf(titulo, df, colunas, cores_linhas, progresso)
+    )